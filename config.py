@@ -52,6 +52,10 @@ class Config:
         "ffmpeg",
         r"D:\programs\ffmpeg-7.1.1-full_build\bin\ffmpeg.exe"
     ]
+    # 硬字幕烧录使用的硬件 H.264 编码器：auto（自动检测）、none（仅用 libx264）
+    # 或指定 h264_nvenc / h264_qsv / h264_vaapi / h264_videotoolbox
+    VIDEO_HW_ENCODER = os.environ.get("VIDEO_HW_ENCODER", "auto")
+    VAAPI_DEVICE = os.environ.get("VAAPI_DEVICE", "/dev/dri/renderD128")
 
     # ==================== 认证配置 ====================
     API_TOKEN = os.environ.get("API_TOKEN", "opq#key")
@@ -75,6 +79,10 @@ class Config:
     VOX_ONNX_OPTIMIZE = os.environ.get("VOX_ONNX_OPTIMIZE", "1").lower() in ("1", "true", "yes")
     VOX_ONNX_DTYPE = os.environ.get("VOX_ONNX_DTYPE", "fp32")
     VOX_ONNX_SQLITE_PATH = os.environ.get("VOX_ONNX_SQLITE_PATH", os.path.join(MODELS_DIR, "voxcpm_ref.db"))
+    # 是否在 SQLite 中缓存 Prefill 状态（相同文本与参考音频重复合成时跳过 Prefill；更换模型后需清空 prefill_states 表）
+    VOX_ONNX_PREFILL_CACHE = os.environ.get("VOX_ONNX_PREFILL_CACHE", "0").lower() in ("1", "true", "yes")
+    # Prefill 状态缓存最多保留的条数（每条含完整 KV 缓存，可达数十 MB），超出时淘汰最久未使用的状态；0 表示不限制
+    VOX_ONNX_PREFILL_CACHE_MAX_ENTRIES = int(os.environ.get("VOX_ONNX_PREFILL_CACHE_MAX_ENTRIES", "32"))
     VOX_ONNX_DEFAULT_CFG = 2.0
     VOX_ONNX_DEFAULT_TIMESTEPS = 5  # VoxCPM-1.5 默认使用 5 timesteps
 
@@ -95,6 +103,10 @@ class Config:
     ZHIPU_MODEL = os.environ.get("ZHIPU_MODEL", "glm-4.5-flash")  # 默认使用 glm-4.5-flash 模型
     ZHIPU_TEMPERATURE = 0.3  # 温度参数，越低越确定
     ZHIPU_MAX_TOKENS = 8000  # 最大 token 数
+    # 字幕与参考文本相似度低于该值时跳过纠错（差异过大，LLM 难以纠正）
+    LLM_CORRECT_MIN_SIMILARITY = float(os.environ.get("LLM_CORRECT_MIN_SIMILARITY", "0.3"))
+    # 字幕与参考文本相似度高于该值时跳过纠错（内容已基本一致）
+    LLM_CORRECT_MAX_SIMILARITY = float(os.environ.get("LLM_CORRECT_MAX_SIMILARITY", "0.99"))
 
     # ==================== 文件持久化配置 ====================
     # HuggingFace Token - 从 https://huggingface.co/settings/tokens 获取
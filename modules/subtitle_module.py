@@ -432,6 +432,7 @@ class SubtitleModule:
                     )
 
             # 合并音视频（如果需要）
+            hardsub_done = False
             if audio_input and local_input:
                 merged_video_path = job_dir / f"{out_basename}_merged{local_input.suffix}"
                 try:
@@ -451,6 +452,28 @@ class SubtitleModule:
                             local_input, processed_audio, merged_video_path, 
                             target_duration=processed_audio_duration, extend_video=True, audio_volume=audio_volume, keep_original_audio=keep_original_audio
                         )
+                    elif burn_subtitles != "none" and srt_path:
+                        # 需要烧录字幕时，音频合并与字幕烧录在一次 ffmpeg 调用中完成
+                        # 以视频时长为准时不使用 -shortest 参数
+                        srt_to_use = bilingual_srt_path if bilingual else srt_path
+                        hardsub_video = job_dir / f"{out_basename}_hardsub{local_input.suffix}"
+                        Logger.info(f"合并音频并烧录硬字幕: {local_input} + {processed_audio} + {srt_to_use} -> {hardsub_video}")
+                        try:
+                            MediaProcessor.burn_hardsub_and_mux(
+                                local_input, srt_to_use, processed_audio, hardsub_video, subtitle_bottom_margin,
+                                use_shortest=duration_reference != "video", audio_volume=audio_volume, keep_original_audio=keep_original_audio
+                            )
+                            merged_video_path = hardsub_video
+                            video_output = hardsub_video
+                            hardsub_done = True
+                        except Exception as e:
+                            # 合并+烧录失败（如字幕滤镜或编码器问题）时先单独合并音视频，
+                            # 保留配音，再由后面的常规流程在合并后的视频上烧录字幕
+                            Logger.warning(f"合并音频并烧录硬字幕失败，改为先合并音视频: {e}")
+                            MediaProcessor.merge_audio_video(
+                                local_input, processed_audio, merged_video_path,
+                                use_shortest=duration_reference != "video", audio_volume=audio_volume, keep_original_audio=keep_original_audio
+                            )
                     elif duration_reference == "video":
                         # 以视频时长为准，不使用 -shortest 参数
                         Logger.info("以视频时长为准，保持视频完整长度")
@@ -477,7 +500,7 @@ class SubtitleModule:
             processing_success = True  # 标志变量，跟踪处理是否成功
             error_messages = []  # 收集错误信息
 
-            if burn_subtitles != "none" and srt_path and base_video:
+            if burn_subtitles != "none" and srt_path and base_video and not hardsub_done:
                 srt_to_use = bilingual_srt_path if bilingual else srt_path
                 hardsub_video = job_dir / f"{out_basename}_hardsub{base_video.suffix}"
 
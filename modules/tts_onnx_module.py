@@ -22,6 +22,7 @@ from utils.tts_onnx import (
     create_run_options,
     configure_providers,
     create_session,
+    create_session_bundle,
     get_device_info_from_providers,
     load_tokenizer,
     build_inputs_v15,
@@ -29,6 +30,7 @@ from utils.tts_onnx import (
     run_inference,
     decode_audio,
     encode_audio_to_patches,
+    read_audio_mono,
     init_db,
     save_ref_features,
     load_ref_features,
@@ -51,14 +53,15 @@ class TTSOnnxModule:
             self.config = config
             self.model_version = "1.5"  # VoxCPM-1.5
             self.tokenizer = None
-            self.prefill_sess = None
-            self.decode_sess = None
+            self.prefill_bundle = None
+            self.decode_bundle = None
             self.vae_enc_sess = None
             self.vae_dec_sess = None
             self.providers = None
             self.provider_options = None
             self.session_opts = None
             self.run_opts = None
+            self.prefill_run_opts = None
             self.patch_size = 4  # VoxCPM-1.5 使用 patch_size=4
             self.sample_rate = 44100  # VoxCPM-1.5 使用 44.1kHz
             self.device_type = 'cpu'
@@ -105,10 +108,16 @@ class TTSOnnxModule:
                 self.providers,
                 self.config.VOX_ONNX_DEVICE_ID
             )
+            # Prefill 只运行一次，结束后收缩内存池；Decode 循环沿用 run_opts，保持内存池
+            self.prefill_run_opts = create_run_options(
+                shrink_arena=True,
+                device_type=self.device_type,
+                device_id=self.device_id
+            )
 
             # 加载 ONNX 模型
             Logger.info("加载 ONNX 模型...")
-            self.prefill_sess = create_session(
+            self.prefill_bundle = create_session_bundle(
                 os.path.join(self.models_dir, "voxcpm_prefill.onnx"),
                 self.session_opts,
                 self.providers,
@@ -116,7 +125,7 @@ class TTSOnnxModule:
             )
             Logger.info("  - Prefill 模型加载完成")
 
-            self.decode_sess = create_session(
+            self.decode_bundle = create_session_bundle(
                 os.path.join(self.models_dir, "voxcpm_decode_step.onnx"),
                 self.session_opts,
                 self.providers,
@@ -260,8 +269,8 @@ class TTSOnnxModule:
             # 运行推理
             Logger.info("开始推理...")
             latents = run_inference(
-                self.prefill_sess,
-                self.decode_sess,
+                self.prefill_bundle,
+                self.decode_bundle,
                 text_token,
                 text_mask,
                 audio_feat,
@@ -274,6 +283,9 @@ class TTSOnnxModule:
                 device_id=self.device_id,
                 inference_dtype=self.inference_dtype,
                 run_options=self.run_opts,
+                prefill_run_options=self.prefill_run_opts,
+                prefill_cache_db=self.sqlite_path if self.config.VOX_ONNX_PREFILL_CACHE else None,
+                prefill_cache_max_entries=self.config.VOX_ONNX_PREFILL_CACHE_MAX_ENTRIES,
                 patch_size=self.patch_size
             )
 
@@ -346,15 +358,8 @@ class TTSOnnxModule:
             await self.initialize()
 
         try:
-            # 读取音频
-            audio, sr = sf.read(prompt_audio_path, always_2d=False)
-            if audio.ndim == 2:
-                audio = audio.mean(axis=1)
-
-            # 重采样到 44.1kHz
-            if sr != self.sample_rate:
-                from utils.tts_onnx.audio_v15 import resample_audio_linear
-                audio = resample_audio_linear(audio, sr, self.sample_rate)
+            # 读取音频（单声道，重采样到 44.1kHz）
+            audio, _ = read_audio_mono(prompt_audio_path, target_sr=self.sample_rate)
 
             # 编码为 patches
             patches = encode_audio_to_patches(
@@ -182,38 +182,24 @@ class VideoEditorModule:
                             # 合并原始视频的音频（如果存在）
                             try:
                                 from utils.system_utils import SystemUtils
+                                from utils.media_processor import MediaProcessor
                                 import shutil
-                                import subprocess
                                 ffmpeg_path = SystemUtils.get_ffmpeg_path()
-                                import os
-                                original_cwd = os.getcwd()
-
-                                output_dir = video_output.parent
-                                os.chdir(output_dir)
-
-                                base_video_rel = os.path.relpath(base_video, output_dir).replace('\\', '/')
-                                temp_video_rel = temp_effects_video.name
-                                output_rel = video_output.name
 
                                 # 检查原始视频是否有音频流
-                                probe_cmd = [ffmpeg_path, "-i", base_video_rel, "-hide_banner"]
-                                # 在 Windows 系统上使用 GBK 编码，在其他系统上使用 UTF-8
-                                encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-                                result = subprocess.run(probe_cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-                                # 检查 result.stderr 是否为 None
-                                has_audio = result.stderr is not None and "Audio:" in result.stderr
+                                has_audio = MediaProcessor.has_audio_stream(Path(base_video).resolve())
 
                                 if has_audio:
-                                    # 有音频，合并音频和视频
+                                    # 有音频，合并音频和视频（使用绝对路径，无需切换工作目录）
                                     cmd = [
                                         ffmpeg_path, "-y",
-                                        "-i", base_video_rel,
-                                        "-i", temp_video_rel,
+                                        "-i", str(Path(base_video).resolve()),
+                                        "-i", str(Path(temp_effects_video).resolve()),
                                         "-map", "0:a:0",
                                         "-map", "1:v:0",
                                         "-c:a", "copy",
                                         "-c:v", "copy",
-                                        output_rel
+                                        str(Path(video_output).resolve())
                                     ]
                                     SystemUtils.run_cmd(cmd)
                                     Logger.info(f"视频效果应用成功（含音频）: {video_output}")
@@ -222,8 +208,6 @@ class VideoEditorModule:
                                     shutil.copy2(temp_effects_video, video_output)
                                     Logger.info(f"视频效果应用成功（无音频）: {video_output}")
 
-                                os.chdir(original_cwd)
-
                             except Exception as merge_error:
                                 error_msg = f"音频处理失败: {str(merge_error)}"
                                 Logger.error(error_msg)
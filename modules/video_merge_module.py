@@ -5,7 +5,9 @@
 """
 
 import os
+import re
 import asyncio
+import subprocess
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
@@ -14,6 +16,12 @@ from utils.logger import Logger
 from utils.file_utils import FileUtils
 from utils.media_processor import MediaProcessor
 
+# 解析 ffmpeg 输出中音频流信息的正则（模块加载时预编译）
+_SAMPLE_RATE_RE = re.compile(r'(\d+) Hz')
+_CHANNELS_RE = re.compile(r'(\d+) channels?')
+# 探测文件头时最多读取的 ffmpeg 输出字节数
+PROBE_HEADER_MAX_BYTES = 32 * 1024
+
 
 class VideoMergeModule:
     """视频合并模块"""
@@ -199,11 +207,7 @@ class VideoMergeModule:
         Logger.info(f"执行视频合并命令（直接复制流）: {' '.join(cmd)}")
 
         # 执行命令
-        original_cwd = os.getcwd()
         try:
-            output_dir = output_path.parent
-            os.chdir(output_dir)
-
             SystemUtils.run_cmd(cmd)
 
             Logger.info(f"视频合并成功: {output_path}")
@@ -211,8 +215,6 @@ class VideoMergeModule:
         except Exception as e:
             Logger.error(f"视频合并失败: {e}")
             raise
-        finally:
-            os.chdir(original_cwd)
 
         # 删除临时文件
         if concat_list_file.exists():
@@ -287,14 +289,9 @@ class VideoMergeModule:
                 Logger.info(f"执行标准化命令（音频+视频）: {' '.join(cmd)}")
 
                 # 执行命令
-                original_cwd = os.getcwd()
-                try:
-                    os.chdir(output_dir)
-                    SystemUtils.run_cmd(cmd)
-                    normalized_paths.append(normalized_path)
-                    Logger.info(f"标准化完成: {normalized_path}")
-                finally:
-                    os.chdir(original_cwd)
+                SystemUtils.run_cmd(cmd)
+                normalized_paths.append(normalized_path)
+                Logger.info(f"标准化完成: {normalized_path}")
 
             except Exception as e:
                 Logger.error(f"标准化视频 {video_path} 时出错: {e}")
@@ -321,48 +318,54 @@ class VideoMergeModule:
         target_sample_rate = 44100
         target_channels = 2
 
-        # 使用 ffprobe 获取音频信息
-        cmd = [
-            ffmpeg_path, "-i", str(video_path),
-            "-f", "null", "-",  # 添加 null 输出，避免 FFmpeg 报错
-            "-hide_banner"
-        ]
+        # 只读取 ffmpeg 输出的文件头信息（不指定输出，ffmpeg 打印流信息后即退出，不会解码整个文件）
+        cmd = [ffmpeg_path, "-hide_banner", "-i", str(video_path)]
 
         try:
             # 在 Windows 系统上使用 GBK 编码，在其他系统上使用 UTF-8
             encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-            result = SystemUtils.run_cmd(cmd, capture_output=True, text=True, encoding=encoding)
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            try:
+                header = proc.stderr.read(PROBE_HEADER_MAX_BYTES)
+            finally:
+                proc.kill()
+                proc.wait()
+                proc.stderr.close()
+
+            # 检查音频流：直接在整段输出中查找，只截取第一条音频流所在行
+            stderr = header.decode(encoding, errors='ignore')
+            audio_pos = stderr.find('Audio:')
+
+            if audio_pos < 0:
+                # 只有完整读到输入信息和流列表时才能确定没有音频流，不需要标准化；
+                # 探测失败（文件不可读、输出在读取上限处被截断）时保守处理，进行标准化
+                if ('Input #0' in stderr and 'Stream #0' in stderr
+                        and len(header) < PROBE_HEADER_MAX_BYTES):
+                    return False
+                Logger.warning(f"无法从 ffmpeg 输出中确定音频流信息，进行标准化: {video_path}")
+                return True
 
-            # 检查音频流
-            has_audio = False
+            line_end = stderr.find('\n', audio_pos)
+            line = stderr[audio_pos:line_end if line_end >= 0 else len(stderr)]
             sample_rate = None
             channels = None
 
-            for line in result.get('stderr', '').split('\n'):
-                if 'Audio:' in line:
-                    has_audio = True
-                    # 解析采样率
-                    import re
-                    rate_match = re.search(r'(\d+) Hz', line)
-                    if rate_match:
-                        sample_rate = int(rate_match.group(1))
-
-                    # 解析声道数
-                    if 'mono' in line.lower():
-                        channels = 1
-                    elif 'stereo' in line.lower():
-                        channels = 2
-                    else:
-                        # 尝试从其他信息中提取声道数
-                        channel_match = re.search(r'(\d+) channels?', line)
-                        if channel_match:
-                            channels = int(channel_match.group(1))
-
-                    break
-
-            # 如果没有音频流，不需要标准化
-            if not has_audio:
-                return False
+            # 解析采样率
+            rate_match = _SAMPLE_RATE_RE.search(line)
+            if rate_match:
+                sample_rate = int(rate_match.group(1))
+
+            # 解析声道数
+            line_lower = line.lower()
+            if 'mono' in line_lower:
+                channels = 1
+            elif 'stereo' in line_lower:
+                channels = 2
+            else:
+                # 尝试从其他信息中提取声道数
+                channel_match = _CHANNELS_RE.search(line)
+                if channel_match:
+                    channels = int(channel_match.group(1))
 
             # 检查是否需要标准化
             if sample_rate and sample_rate != target_sample_rate:
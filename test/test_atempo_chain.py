@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Atempo Chain Test Cases
+
+Test _atempo_chain splitting speed factors into cascaded atempo filters
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.media_processor import _atempo_chain
+
+
+def test_atempo_chain():
+    """Test cascade factors stay within atempo's 0.5 ~ 2.0 range"""
+    print("=" * 60)
+    print("Testing Atempo Chain")
+    print("=" * 60)
+
+    test_cases = [
+        # (speed factor, expected filter chain)
+        (0.25, "atempo=0.5,atempo=0.5"),
+        (3.0, "atempo=2,atempo=1.5"),
+        (1.0, "atempo=1"),
+    ]
+
+    for speed_factor, expected in test_cases:
+        result = _atempo_chain(speed_factor)
+        print(f"\nSpeed: {speed_factor}")
+        print(f"  Expected: {expected}")
+        print(f"  Actual:   {result}")
+        assert result == expected
+
+
+if __name__ == "__main__":
+    print("Starting atempo chain tests\n")
+
+    test_atempo_chain()
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
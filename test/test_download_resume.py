@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Download Resume Test Cases
+
+Test MediaProcessor.download_from_url resuming through Range/If-Range against a local HTTP server
+"""
+
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.media_processor import MediaProcessor
+
+PAYLOAD = bytes(range(256)) * 64
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serve PAYLOAD with ETag, honouring Range only when If-Range matches"""
+
+    def do_GET(self):
+        self.server.received.append(dict(self.headers))
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and if_range in (None, ETAG):
+            start = int(range_header.split("=", 1)[1].rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = PAYLOAD[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def _serve():
+    """Start a local HTTP server, yielding (base url, received request headers)"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.received = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", server.received
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _prepare_part(output_path: Path, data: bytes, validator: str):
+    """Write a leftover .part file and its validator sidecar"""
+    part_path = output_path.with_name(output_path.name + ".part")
+    part_path.write_bytes(data)
+    MediaProcessor._validator_path(part_path).write_text(validator, encoding="utf-8")
+
+
+def _leftovers(output_path: Path):
+    """List temporary files left next to the output"""
+    return sorted(p.name for p in output_path.parent.iterdir() if p != output_path)
+
+
+def test_resume_with_partial_content():
+    """Test a matching validator resumes with a 206 response"""
+    with _serve() as (base_url, received), tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "video.mp4"
+        _prepare_part(output_path, PAYLOAD[:1000], ETAG)
+
+        MediaProcessor.download_from_url(f"{base_url}/video.mp4", output_path)
+
+        print(f"\nRequest headers: Range={received[0].get('Range')}, If-Range={received[0].get('If-Range')}")
+        assert received[0].get("Range") == "bytes=1000-"
+        assert received[0].get("If-Range") == ETAG
+        assert output_path.read_bytes() == PAYLOAD
+        assert _leftovers(output_path) == []
+
+
+def test_restart_when_remote_changed():
+    """Test a stale validator gets a 200 response and the file is downloaded from scratch"""
+    with _serve() as (base_url, received), tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "video.mp4"
+        _prepare_part(output_path, b"x" * 1000, '"v0"')
+
+        MediaProcessor.download_from_url(f"{base_url}/video.mp4", output_path)
+
+        assert received[0].get("If-Range") == '"v0"'
+        assert output_path.read_bytes() == PAYLOAD
+        assert _leftovers(output_path) == []
+
+
+def test_complete_part_range_not_satisfiable():
+    """Test a 416 for an already complete .part file finishes without downloading again"""
+    with _serve() as (base_url, received), tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "video.mp4"
+        _prepare_part(output_path, PAYLOAD, ETAG)
+
+        MediaProcessor.download_from_url(f"{base_url}/video.mp4", output_path)
+
+        assert len(received) == 1
+        assert output_path.read_bytes() == PAYLOAD
+        assert _leftovers(output_path) == []
+
+
+def test_failure_removes_temporary_files():
+    """Test a permanent failure leaves neither the .part file nor its validator behind"""
+    with _serve() as (base_url, received), tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "video.mp4"
+        _prepare_part(output_path, PAYLOAD[:1000], ETAG)
+
+        try:
+            MediaProcessor.download_from_url(f"{base_url}/missing", output_path)
+        except Exception as e:
+            print(f"\nDownload failed as expected: {e}")
+        else:
+            raise AssertionError("Download of a missing file did not fail")
+
+        assert not output_path.exists()
+        assert _leftovers(output_path) == []
+
+
+if __name__ == "__main__":
+    print("Starting download resume tests\n")
+
+    test_resume_with_partial_content()
+    test_restart_when_remote_changed()
+    test_complete_part_range_not_satisfiable()
+    test_failure_removes_temporary_files()
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Feature Store Test Cases
+
+Test the SQLite feature store in utils.tts_onnx.store
+"""
+
+import io
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.tts_onnx import store
+from utils.tts_onnx.store import (
+    _decode_array, _encode_array, close_db, init_db,
+    load_prefill_state, load_ref_features, save_prefill_state, save_ref_features,
+)
+
+
+@contextmanager
+def _temp_db(name):
+    """Yield a database path in a temporary directory, closing connections before cleanup"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / name)
+        try:
+            yield db_path
+        finally:
+            close_db(db_path)
+
+
+def test_wal_connection_per_thread():
+    """Test each thread reuses one WAL-mode connection per database"""
+    print("=" * 60)
+    print("Testing Per-thread WAL Connections")
+    print("=" * 60)
+
+    with _temp_db("wal.db") as db_path:
+        init_db(db_path)
+        conn = store._get_conn(db_path)
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        print(f"\nJournal mode: {journal_mode}")
+        assert journal_mode.lower() == "wal"
+        assert store._get_conn(db_path) is conn
+
+        other = []
+
+        def worker():
+            other.append(store._get_conn(db_path))
+            close_db(db_path)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        print(f"  Other thread got its own connection: {other[0] is not conn}")
+        assert other[0] is not conn
+
+
+def test_encode_decode_roundtrip():
+    """Test _encode_array / _decode_array keep dtype, shape and values"""
+    print("\n" + "=" * 60)
+    print("Testing Array Round Trip")
+    print("=" * 60)
+
+    arrays = [
+        np.arange(24, dtype=np.float32).reshape(2, 3, 4),
+        np.arange(6, dtype=np.float16).reshape(3, 2).T,  # non-contiguous input
+        np.array(7, dtype=np.int64),
+    ]
+
+    for arr in arrays:
+        blob, array_dtype, shape_str = _encode_array(arr)
+        result = _decode_array(blob, array_dtype, shape_str)
+        print(f"\nInput: dtype={arr.dtype}, shape={arr.shape}")
+        print(f"  Stored: dtype={array_dtype}, shape='{shape_str}'")
+        assert result.dtype == arr.dtype
+        assert result.shape == arr.shape
+        assert np.array_equal(result, arr)
+
+
+def test_ref_features_roundtrip():
+    """Test save_ref_features / load_ref_features with the raw-bytes format"""
+    print("\n" + "=" * 60)
+    print("Testing Reference Feature Round Trip")
+    print("=" * 60)
+
+    patches = np.random.rand(1, 5, 4).astype(np.float32)
+    with _temp_db("ref.db") as db_path:
+        save_ref_features(db_path, "ref", "hello", 4, "fp32", patches)
+        result, patch_size, prompt_text, dtype_str = load_ref_features(db_path, "ref")
+        print(f"\nLoaded: shape={result.shape}, patch_size={patch_size}, prompt='{prompt_text}'")
+        assert np.array_equal(result, patches)
+        assert (patch_size, prompt_text, dtype_str) == (4, "hello", "fp32")
+
+
+def test_legacy_npy_fallback():
+    """Test rows written before the array_dtype/shape columns still load"""
+    print("\n" + "=" * 60)
+    print("Testing Legacy npy Fallback")
+    print("=" * 60)
+
+    patches = np.random.rand(1, 5, 4).astype(np.float32)
+    buf = io.BytesIO()
+    np.save(buf, patches)
+
+    with _temp_db("legacy.db") as db_path:
+        init_db(db_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO ref_features (id, prompt_text, patch_size, dtype, created_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    ("legacy", "hello", 4, "fp32", 0, sqlite3.Binary(buf.getvalue())),
+                )
+        finally:
+            conn.close()
+
+        result, patch_size, prompt_text, dtype_str = load_ref_features(db_path, "legacy")
+        print(f"\nLoaded: shape={result.shape}, patch_size={patch_size}, prompt='{prompt_text}'")
+        assert np.array_equal(result, patches)
+        assert (patch_size, prompt_text, dtype_str) == (4, "hello", "fp32")
+
+
+def test_prefill_cache_eviction():
+    """Test prefill states round trip and least recently used states are evicted"""
+    print("\n" + "=" * 60)
+    print("Testing Prefill State Cache")
+    print("=" * 60)
+
+    states = {
+        "dit_hidden": np.random.rand(1, 8).astype(np.float32),
+        "base_next_keys": np.random.rand(2, 1, 3, 4).astype(np.float16),
+    }
+
+    with _temp_db("prefill.db") as db_path:
+        assert load_prefill_state(db_path, "missing") is None
+
+        save_prefill_state(db_path, "a", states, max_entries=2)
+        loaded = load_prefill_state(db_path, "a")
+        assert set(loaded) == set(states)
+        assert all(np.array_equal(loaded[name], states[name]) for name in states)
+
+        # last_used is stored in milliseconds, so space the calls out
+        time.sleep(0.01)
+        save_prefill_state(db_path, "b", states, max_entries=2)
+        time.sleep(0.01)
+        load_prefill_state(db_path, "a")  # a becomes the most recently used state
+        time.sleep(0.01)
+        save_prefill_state(db_path, "c", states, max_entries=2)
+
+        kept = [state_id for state_id in ("a", "b", "c") if load_prefill_state(db_path, state_id) is not None]
+        print(f"\nKept states: {kept}")
+        assert kept == ["a", "c"]
+
+
+if __name__ == "__main__":
+    print("Starting feature store tests\n")
+
+    test_wal_connection_per_thread()
+    test_encode_decode_roundtrip()
+    test_ref_features_roundtrip()
+    test_legacy_npy_fallback()
+    test_prefill_cache_eviction()
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
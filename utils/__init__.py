@@ -11,7 +11,7 @@ from .subtitle_generator import SubtitleGenerator
 from .video_effects import VideoEffectsProcessor
 from .video_utils import VideoUtils
 from .logger import Logger
-from .font_manager import FontManager, font_manager
+from .font_manager import font_manager
 
 __all__ = [
     'FileUtils',
@@ -21,6 +21,5 @@ __all__ = [
     'VideoEffectsProcessor',
     'VideoUtils',
     'Logger',
-    'FontManager',
     'font_manager'
 ]
\ No newline at end of file
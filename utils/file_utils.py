@@ -7,39 +7,60 @@
 import shutil
 from pathlib import Path
 from datetime import datetime
-from typing import List
+from typing import List, Set
 
 from config import config
 
+# 任务ID / 任务目录的时间戳格式（yyyyMMdd-HHMMSS）
+JOB_ID_FORMAT = "%Y%m%d-%H%M%S"
+
+# 文件大小单位（按 1024 递进）
+FILE_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
 
 class FileUtils:
     """文件操作工具类"""
 
+    # 进程内已确认存在的目录，避免重复的 mkdir 系统调用
+    _ensured_dirs: Set[str] = set()
+
+    @classmethod
+    def ensure_dir(cls, dir_path: Path) -> Path:
+        """
+        确保目录存在（每个进程内对同一目录只执行一次 mkdir）
+
+        Args:
+            dir_path: 目录路径
+
+        Returns:
+            Path: 目录路径
+        """
+        key = str(dir_path)
+        if key not in cls._ensured_dirs:
+            Path(dir_path).mkdir(parents=True, exist_ok=True)
+            cls._ensured_dirs.add(key)
+        return dir_path
+
     @staticmethod
     def get_output_dir() -> Path:
         """获取输出目录"""
         current_dir = Path(__file__).parent.parent
         output_dir = current_dir / config.OUTPUT_FOLDER
-        output_dir.mkdir(exist_ok=True)
+        FileUtils.ensure_dir(output_dir)
         return output_dir
 
     @staticmethod
     def create_job_dir() -> Path:
         """创建任务目录，使用yyyyMMdd-HHMMSS格式命名"""
         output_dir = FileUtils.get_output_dir()
-        now = datetime.now()
-        date_str = now.strftime("%Y%m%d")
-        time_str = now.strftime("%H%M%S")
-        job_dir_name = f"job_{date_str}-{time_str}"
-        job_dir = output_dir / job_dir_name
-        job_dir.mkdir(exist_ok=True)
+        job_dir = output_dir / f"job_{FileUtils.generate_job_id()}"
+        FileUtils.ensure_dir(job_dir)
         return job_dir
 
     @staticmethod
     def generate_job_id() -> str:
         """生成任务ID，使用yyyyMMdd-HHMMSS格式"""
-        now = datetime.now()
-        return now.strftime("%Y%m%d-%H%M%S")
+        return datetime.now().strftime(JOB_ID_FORMAT)
 
     @staticmethod
     def get_file_extension(filename: str) -> str:
@@ -135,8 +156,8 @@ class FileUtils:
     @staticmethod
     def format_file_size(size_bytes: int) -> str:
         """格式化文件大小为人类可读格式"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
\ No newline at end of file
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f} B"
+        # 通过二进制位数直接确定单位（每 10 位为一级），无需逐级除法
+        index = min((int(size_bytes).bit_length() - 1) // 10, len(FILE_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (10 * index)):.2f} {FILE_SIZE_UNITS[index]}"
\ No newline at end of file
@@ -12,25 +12,21 @@ from PIL import ImageFont
 from utils.logger import Logger
 
 
-class FontManager:
-    """字体管理工具类"""
+__all__ = ['font_manager']
+
 
-    _instance = None
-    _fonts_dir = None
-    _available_fonts = []
+class FontManager:
+    """
+    字体管理工具类
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    模块加载时创建唯一实例 font_manager，请直接使用该实例，不要自行实例化。
+    """
 
     def __init__(self):
-        if not hasattr(self, 'initialized'):
-            self._fonts_dir = Path(__file__).parent.parent / "fonts"
-            self._fonts_dir.mkdir(exist_ok=True)
-            self._available_fonts = []
-            self._scan_fonts()
-            self.initialized = True
+        self._fonts_dir = Path(__file__).parent.parent / "fonts"
+        self._fonts_dir.mkdir(exist_ok=True)
+        self._available_fonts: List[str] = []
+        self._scan_fonts()
 
     @property
     def fonts_dir(self) -> Path:
@@ -4,6 +4,7 @@
 使用智谱 AI 模型对生成的字幕内容进行智能纠错。
 """
 
+import difflib
 import json
 import requests
 from typing import List, Dict, Any, Optional
@@ -16,6 +17,8 @@ from utils.logger import Logger
 @dataclass
 class SubtitleSegment:
     """字幕片段"""
+    __slots__ = ('start', 'end', 'text')
+
     start: float
     end: float
     text: str
@@ -49,6 +52,7 @@ class LLMCorrector:
 
         headers = {
             "Content-Type": "application/json",
+            "Accept": "text/event-stream",
             "Authorization": f"Bearer {self.api_key}"
         }
 
@@ -57,7 +61,7 @@ class LLMCorrector:
             "messages": messages,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
-            "stream": False
+            "stream": True
         }
 
         try:
@@ -71,8 +75,27 @@ class LLMCorrector:
                     timeout=600
                 ) as response:
                     response.raise_for_status()
-                    result = await response.json()
-                    content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+                    # 以 SSE 流式读取，边接收边累积增量内容
+                    chunks: List[str] = []
+                    async for raw_line in response.content:
+                        line = raw_line.decode("utf-8").strip()
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            event = json.loads(data)
+                        except json.JSONDecodeError:
+                            Logger.warning(f"无法解析流式响应片段: {data[:100]}")
+                            continue
+                        choices = event.get("choices") or [{}]
+                        delta = choices[0].get("delta", {}).get("content")
+                        if delta:
+                            chunks.append(delta)
+
+                    content = "".join(chunks)
 
                     Logger.info(f"智谱 AI API 调用成功，返回 {len(content)} 字符")
                     return content
@@ -118,6 +141,42 @@ class LLMCorrector:
             self.api_key = original_api_key
             self.model = original_model
 
+    @staticmethod
+    def _should_skip_correction(subtitle_text: str, reference_text: str) -> bool:
+        """
+        判断是否可以跳过 LLM 纠错（避免不必要的网络请求）
+
+        Args:
+            subtitle_text: 原始字幕文本
+            reference_text: 参考文本
+
+        Returns:
+            bool: 是否跳过纠错
+        """
+        # 忽略空白字符（字幕按行分隔，参考文本通常不分行）
+        subtitle_compact = "".join(subtitle_text.split())
+        reference_compact = "".join(reference_text.split())
+
+        if subtitle_compact == reference_compact:
+            Logger.info("字幕文本与参考文本一致，跳过字幕纠错")
+            return True
+
+        matcher = difflib.SequenceMatcher(None, subtitle_compact, reference_compact, autojunk=False)
+
+        # quick_ratio 仅统计字符，是相似度的上界，开销为 O(N)
+        upper_bound = matcher.quick_ratio()
+        if upper_bound < config.LLM_CORRECT_MIN_SIMILARITY:
+            Logger.warning(f"字幕文本与参考文本差异过大（相似度上界 {upper_bound:.2f}），跳过字幕纠错")
+            return True
+
+        if upper_bound > config.LLM_CORRECT_MAX_SIMILARITY:
+            similarity = matcher.ratio()
+            if similarity > config.LLM_CORRECT_MAX_SIMILARITY:
+                Logger.info(f"字幕文本与参考文本基本一致（相似度 {similarity:.2f}），跳过字幕纠错")
+                return True
+
+        return False
+
     async def correct_subtitle_text(
         self,
         subtitle_text: str,
@@ -141,6 +200,13 @@ class LLMCorrector:
             Logger.warning("参考文本为空，跳过字幕纠错")
             return subtitle_text
 
+        if not subtitle_text or not subtitle_text.strip():
+            Logger.warning("字幕文本为空，跳过字幕纠错")
+            return subtitle_text
+
+        if self._should_skip_correction(subtitle_text, reference_text):
+            return subtitle_text
+
         # 打印纠错前的信息
         Logger.info("=" * 80)
         Logger.info("开始 LLM 字幕纠错")
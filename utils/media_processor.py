@@ -5,19 +5,370 @@
 """
 
 import os
-import re
+import json
+import time
+import shutil
 import requests
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Any, Callable, Iterable, List, Tuple, Optional
+from requests.adapters import HTTPAdapter
 
+try:
+    import av  # PyAV（可选），用于进程内探测媒体信息
+except ImportError:
+    av = None
+
+from utils.file_utils import FileUtils
 from utils.system_utils import SystemUtils
 from utils.logger import Logger
 
 
+# 下载使用的共享会话，复用 TCP/TLS 连接（HTTP keep-alive）
+# 重试统一由 download_from_url 的续传循环负责，连接池本身不再重试
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# 下载时每次读取的块大小（1 MiB）
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# 下载失败时的最大尝试次数与退避基数（秒）
+DOWNLOAD_MAX_ATTEMPTS = 3
+DOWNLOAD_RETRY_BACKOFF = 1.0
+
+
+# 线程本地状态：batch 并行执行时为每个任务限定 ffmpeg 编码线程数
+_thread_state = threading.local()
+
+
+# 编码器初始化失败时 ffmpeg stderr 中的特征文本，用于区分编码器问题与字幕滤镜问题
+_ENCODER_FAILURE_MARKERS = (
+    "Error while opening encoder",
+    "Could not open encoder",
+    "Error initializing output stream",
+    "No capable devices found",
+    "No NVENC capable devices found",
+    "OpenEncodeSessionEx failed",
+    "Failed to initialise VAAPI",
+    "Error creating a MFX session",
+    "Device creation failed",
+)
+
+# ffmpeg 按输出扩展名默认选用的音频编码，输入已是该编码时复制文件与重新编码得到相同格式
+_DEFAULT_AUDIO_CODECS = {
+    ".wav": "pcm_s16le",
+    ".m4a": "aac",
+    ".aac": "aac",
+    ".mp3": "mp3",
+}
+
+
+def _is_encoder_failure(stderr: Optional[str]) -> bool:
+    """
+    判断 ffmpeg 失败是否由编码器无法初始化引起
+
+    Args:
+        stderr: ffmpeg 的标准错误输出
+
+    Returns:
+        bool: 是编码器初始化失败时返回 True
+    """
+    return bool(stderr) and any(marker in stderr for marker in _ENCODER_FAILURE_MARKERS)
+
+
+def _escape_filter_path(path: Path) -> str:
+    """
+    将文件路径转义为可直接用于 ffmpeg 滤镜参数（subtitles= / ass=）的形式
+
+    滤镜参数会被 ffmpeg 解析两次：先按滤镜图语法（处理 \\ ' [ ] , ;），
+    再按滤镜选项语法（处理 \\ : '），因此需要由内到外逐层转义，而不是加单引号。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        str: 使用正斜杠并经过两级转义的路径
+    """
+    escaped = str(path).replace('\\', '/')
+    escaped = ''.join('\\' + ch if ch in "\\:'" else ch for ch in escaped)
+    return ''.join('\\' + ch if ch in "\\'[],;" else ch for ch in escaped)
+
+
+def _movflags_args(fragmented: bool) -> List[str]:
+    """
+    获取 MP4 封装参数
+
+    默认使用 faststart，兼容性和拖动定位表现最好；分片 MP4（empty_moov）在开头直接写入 moov，
+    省去编码结束后重写整个文件，但拖动定位较差，部分播放器和上传目标不接受，只在调用方明确需要时使用。
+
+    Args:
+        fragmented: 是否输出分片 MP4
+
+    Returns:
+        List[str]: ffmpeg -movflags 参数
+    """
+    if fragmented:
+        return ["-movflags", "+frag_keyframe+empty_moov+default_base_moof"]
+    return ["-movflags", "+faststart"]
+
+
+def _atempo_chain(speed_factor: float) -> str:
+    """
+    将语速倍数分解为级联的 atempo 滤镜（每级限制在 0.5 ~ 2.0 之间）
+
+    例如 0.25 -> "atempo=0.5,atempo=0.5"，4.0 -> "atempo=2,atempo=2"。
+
+    Args:
+        speed_factor: 语速调整倍数
+
+    Returns:
+        str: atempo 滤镜链
+
+    Raises:
+        ValueError: 倍数不为正数时抛出
+    """
+    if speed_factor <= 0:
+        raise ValueError(f"语速调整倍数必须大于 0: {speed_factor}")
+
+    parts = []
+    remaining = speed_factor
+    while remaining > 2.0:
+        parts.append(2.0)
+        remaining /= 2.0
+    while remaining < 0.5:
+        parts.append(0.5)
+        remaining /= 0.5
+    parts.append(remaining)
+    return ",".join(f"atempo={part:.6g}" for part in parts)
+
+
+def _amix_graph(audio_volume: float) -> str:
+    """
+    构建原视频音频与新音频混合的滤镜图（只调整新音频音量），输出标签为 [aout]
+
+    Args:
+        audio_volume: 新音频音量倍数
+
+    Returns:
+        str: filter_complex 滤镜图
+    """
+    if audio_volume != 1.0:
+        return f"[1:a]volume={audio_volume}[a1_vol];[0:a][a1_vol]amix=inputs=2:duration=first:dropout_transition=2[aout]"
+    return "[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2[aout]"
+
+
+def _av_probe(file_path: str) -> dict:
+    """
+    使用 PyAV 在进程内读取容器头部，返回与 ffprobe JSON 相同结构的结果
+
+    Args:
+        file_path: 媒体文件路径
+
+    Returns:
+        dict: 包含 streams 和 format 的探测结果
+    """
+    with av.open(file_path) as container:
+        streams = []
+        for stream in container.streams:
+            info = {"codec_type": stream.type, "codec_name": stream.codec_context.name}
+            if stream.type == "video":
+                info["width"] = stream.codec_context.width
+                info["height"] = stream.codec_context.height
+            elif stream.type == "audio":
+                info["sample_rate"] = str(stream.codec_context.sample_rate)
+                info["channels"] = stream.codec_context.channels
+            if stream.bit_rate:
+                info["bit_rate"] = str(stream.bit_rate)
+            if stream.duration is not None and stream.time_base is not None:
+                info["duration"] = str(float(stream.duration * stream.time_base))
+            streams.append(info)
+
+        media_format = {}
+        if container.duration is not None:
+            media_format["duration"] = str(container.duration / av.time_base)
+    return {"streams": streams, "format": media_format}
+
+
+@lru_cache(maxsize=128)
+def _ffprobe(file_path: str, file_size: int, file_mtime: float) -> dict:
+    """
+    探测媒体文件信息（file_size 与 file_mtime 仅作为缓存键）
+
+    安装了 PyAV 时直接在进程内读取容器头部，否则（或 PyAV 打开失败时）执行 ffprobe 并解析 JSON 输出。
+
+    Raises:
+        RuntimeError: ffprobe 执行失败时抛出（失败结果不会被缓存）
+    """
+    if av is not None:
+        try:
+            return _av_probe(file_path)
+        except Exception as e:
+            Logger.debug(f"PyAV 探测失败，回退到 ffprobe: {file_path}, 错误: {e}")
+
+    cmd = [
+        SystemUtils.get_ffprobe_path(), "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name,width,height,duration,sample_rate,channels,bit_rate:format=duration",
+        "-of", "json", file_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+
+    probe = json.loads(result.stdout or "{}")
+    probe.setdefault("streams", [])
+    probe.setdefault("format", {})
+    return probe
+
+
 class MediaProcessor:
     """媒体处理工具类"""
 
+    @staticmethod
+    def _probe(file_path: Path) -> dict:
+        """
+        使用 ffprobe 获取媒体文件的流和封装信息（JSON 格式）
+
+        结果按 (路径, 文件大小, 修改时间) 缓存，同一流水线内重复探测同一文件时不再启动子进程。
+
+        Args:
+            file_path: 媒体文件路径
+
+        Returns:
+            dict: 包含 streams 和 format 的探测结果，失败时返回空结构
+        """
+        try:
+            stat = os.stat(file_path)
+            return _ffprobe(str(file_path), stat.st_size, stat.st_mtime)
+        except (OSError, RuntimeError, ValueError) as e:
+            Logger.warning(f"ffprobe 探测失败: {file_path}, 错误: {e}")
+            return {"streams": [], "format": {}}
+
+    @staticmethod
+    def _encoder_thread_args(encoder: str = "", threads: Optional[int] = None) -> List[str]:
+        """
+        获取当前任务的 ffmpeg 编码线程参数
+
+        在 batch 并行执行（或显式指定 threads）时返回 ["-threads", N]，避免多个 ffmpeg 进程争抢 CPU；
+        libx264 额外使用帧级多线程（sliced-threads=0），并行编码多个文件时扩展性更好。
+        单独调用且未指定 threads 时返回空列表，由 ffmpeg 自行决定线程数。
+
+        Args:
+            encoder: 视频编码器名称，如 libx264
+            threads: 编码线程数（默认使用 batch 分配的线程数）
+
+        Returns:
+            List[str]: ffmpeg 线程参数
+        """
+        if threads is None:
+            threads = getattr(_thread_state, "ffmpeg_threads", None)
+        if not threads:
+            return []
+
+        args = ["-threads", str(threads)]
+        if encoder == "libx264":
+            args.extend(["-x264-params", f"threads={threads}:sliced-threads=0"])
+        return args
+
+    @staticmethod
+    def _decoder_thread_args() -> List[str]:
+        """
+        获取放在 -i 之前的 ffmpeg 解码线程参数
+
+        单独调用时为 -threads 0（自动使用全部核心）；在 batch 并行执行时使用分配给当前任务的线程数。
+
+        Returns:
+            List[str]: ffmpeg 线程参数
+        """
+        threads = getattr(_thread_state, "ffmpeg_threads", None) or 0
+        return ["-threads", str(threads)]
+
+    @staticmethod
+    def batch(func: Callable[..., Any], jobs: Iterable[tuple], workers: Optional[int] = None) -> List[Any]:
+        """
+        并行执行多个相互独立的媒体处理任务
+
+        每个任务只是等待 ffmpeg 子进程，因此使用线程池即可；
+        CPU 核心按并行数平均分配给各个 ffmpeg 编码进程。
+
+        Args:
+            func: 媒体处理函数，如 MediaProcessor.burn_hardsub
+            jobs: 参数元组列表，每个元组对应一次 func(*args) 调用
+            workers: 并行数（默认 CPU 核心数的一半）
+
+        Returns:
+            List[Any]: 按 jobs 顺序排列的执行结果
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return []
+
+        cpu_count = os.cpu_count() or 2
+        if workers is None:
+            workers = max(1, cpu_count // 2)
+        workers = max(1, min(workers, len(jobs)))
+        threads_per_job = max(1, cpu_count // workers)
+
+        def run_job(args: tuple) -> Any:
+            _thread_state.ffmpeg_threads = threads_per_job
+            try:
+                return func(*args)
+            finally:
+                _thread_state.ffmpeg_threads = None
+
+        Logger.info(f"并行执行 {len(jobs)} 个媒体任务，并行数: {workers}，每个任务线程数: {threads_per_job}")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run_job, jobs))
+
+    @staticmethod
+    def _demux_probe(file_path: Path) -> dict:
+        """
+        仅解封装（不解码）统计首个视频流的包数，用于文件头信息不完整的情况
+
+        Args:
+            file_path: 媒体文件路径
+
+        Returns:
+            dict: 首个视频流的 width/height/duration/nb_read_packets/avg_frame_rate，
+                  以及封装层 duration（键 format_duration），失败时返回空字典
+        """
+        cmd = [
+            SystemUtils.get_ffprobe_path(), "-v", "error",
+            "-count_packets", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,duration,nb_read_packets,avg_frame_rate:format=duration",
+            "-of", "json", str(file_path)
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            if result.returncode != 0:
+                return {}
+            probe = json.loads(result.stdout or "{}")
+        except (OSError, ValueError) as e:
+            Logger.warning(f"ffprobe 解封装探测失败: {file_path}, 错误: {e}")
+            return {}
+
+        streams = probe.get("streams") or [{}]
+        info = dict(streams[0])
+        info["format_duration"] = probe.get("format", {}).get("duration")
+        return info
+
+    @staticmethod
+    def has_audio_stream(file_path: Path) -> bool:
+        """
+        判断媒体文件是否包含音频流
+
+        Args:
+            file_path: 媒体文件路径
+
+        Returns:
+            bool: 是否包含音频流
+        """
+        probe = MediaProcessor._probe(file_path)
+        return any(stream.get("codec_type") == "audio" for stream in probe["streams"])
+
     @staticmethod
     def extract_audio(input_path: Path, output_path: Path, sample_rate: int = 16000):
         """
@@ -34,18 +385,8 @@ class MediaProcessor:
         ffmpeg_path = SystemUtils.get_ffmpeg_path()
 
         # 首先检查输入文件是否包含音频流
-        probe_cmd = [ffmpeg_path, "-i", str(input_path), "-hide_banner"]
-        # 在 Windows 系统上使用 GBK 编码，在其他系统上使用 UTF-8
-        encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-        result = subprocess.run(probe_cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-        
-        # 检查是否有音频流
-        has_audio = False
-        for line in result.stderr.split('\n'):
-            if 'Audio:' in line:
-                has_audio = True
-                break
-        
+        has_audio = MediaProcessor.has_audio_stream(input_path)
+
         if not has_audio:
             Logger.warning(f"输入文件没有音频流: {input_path}")
             # 创建一个静音音频文件
@@ -74,30 +415,126 @@ class MediaProcessor:
             ]
             SystemUtils.run_cmd(cmd)
 
+    @staticmethod
+    def _validator_path(part_path: Path) -> Path:
+        """获取 .part 临时文件对应的校验信息文件路径（保存 ETag 或 Last-Modified）"""
+        return part_path.with_name(part_path.name + ".validator")
+
+    @staticmethod
+    def _download_to_part(url: str, part_path: Path, timeout: int):
+        """
+        下载（或续传）URL 内容到临时 .part 文件
+
+        续传时通过 If-Range 携带首次下载时记录的 ETag/Last-Modified，
+        远端文件已变化时服务端返回 200 完整内容，从头下载；没有校验信息的 .part 文件直接丢弃。
+
+        Args:
+            url: 文件URL
+            part_path: 临时文件路径
+            timeout: 超时时间（秒）
+
+        Raises:
+            IOError: 下载内容不完整时抛出
+        """
+        validator_path = MediaProcessor._validator_path(part_path)
+        existing = part_path.stat().st_size if part_path.exists() else 0
+        validator = validator_path.read_text(encoding="utf-8").strip() if validator_path.exists() else ""
+        if existing and not validator:
+            # 无法确认已下载部分与远端是同一个文件，不能拼接
+            Logger.warning(f"临时文件缺少校验信息，重新下载: {part_path}")
+            part_path.unlink()
+            existing = 0
+
+        # 续传依赖字节偏移，要求服务端返回未压缩的原始内容
+        headers = {"Accept-Encoding": "identity"}
+        if existing:
+            headers["Range"] = f"bytes={existing}-"
+            headers["If-Range"] = validator
+
+        with _SESSION.get(url, stream=True, timeout=timeout, headers=headers) as r:
+            if r.status_code == 416 and existing:
+                # 请求范围超出文件大小：已下载部分即为完整文件
+                total = r.headers.get("Content-Range", "").rpartition("/")[2]
+                if total.isdigit() and int(total) == existing:
+                    return
+                part_path.unlink()
+                raise IOError(f"续传范围无效，已丢弃临时文件: {part_path}")
+
+            r.raise_for_status()
+            r.raw.decode_content = True
+
+            if r.status_code == 206:
+                Logger.info(f"从 {existing} 字节处续传: {url}")
+                mode = "ab"
+            else:
+                # 服务端不支持 Range 或远端文件已变化，从头下载并记录新的校验信息
+                existing = 0
+                mode = "wb"
+                etag = r.headers.get("ETag", "")
+                # If-Range 只接受强 ETag，弱 ETag 时退回 Last-Modified
+                validator = etag if etag and not etag.startswith("W/") else r.headers.get("Last-Modified", "")
+                if validator:
+                    validator_path.write_text(validator, encoding="utf-8")
+                elif validator_path.exists():
+                    validator_path.unlink()
+
+            content_length = r.headers.get("Content-Length")
+            expected_size = None
+            if content_length and content_length.isdigit() and not r.headers.get("Content-Encoding"):
+                expected_size = existing + int(content_length)
+
+            with open(part_path, mode) as f:
+                shutil.copyfileobj(r.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+
+        if expected_size is not None and part_path.stat().st_size != expected_size:
+            raise IOError(f"下载不完整: {part_path.stat().st_size}/{expected_size} 字节")
+
     @staticmethod
     def download_from_url(url: str, output_path: Path, timeout: int = 60):
         """
         从URL下载文件
 
+        先写入同目录下的 .part 临时文件，失败时保留已下载部分并通过 HTTP Range 续传，
+        完成后原子替换为目标文件；重试耗尽后删除临时文件。
+
         Args:
             url: 文件URL
             output_path: 输出文件路径
             timeout: 超时时间（秒）
         """
         output_path = Path(output_path).resolve()
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        FileUtils.ensure_dir(output_path.parent)
+        part_path = output_path.with_name(output_path.name + ".part")
 
         Logger.info(f"Downloading URL: {url} to {output_path}")
         try:
-            with requests.get(url, stream=True, timeout=timeout) as r:
-                r.raise_for_status()
-                with open(output_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
+            for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+                try:
+                    MediaProcessor._download_to_part(url, part_path, timeout)
+                    break
+                except requests.HTTPError as e:
+                    # 客户端错误（如 404）重试无意义
+                    if e.response is not None and e.response.status_code < 500:
+                        raise
+                    if attempt == DOWNLOAD_MAX_ATTEMPTS:
+                        raise
+                    Logger.warning(f"下载失败（第 {attempt} 次）: {e}，准备重试")
+                except (requests.RequestException, IOError) as e:
+                    if attempt == DOWNLOAD_MAX_ATTEMPTS:
+                        raise
+                    Logger.warning(f"下载失败（第 {attempt} 次）: {e}，准备续传")
+                time.sleep(DOWNLOAD_RETRY_BACKOFF * (2 ** (attempt - 1)))
+
+            os.replace(part_path, output_path)
+            validator_path = MediaProcessor._validator_path(part_path)
+            if validator_path.exists():
+                validator_path.unlink()
             Logger.info(f"Downloaded successfully: {output_path}")
         except Exception as e:
             Logger.error(f"Failed to download {url}: {e}")
+            # 重试耗尽后不再续传，清理临时文件及其校验信息，避免残留在输出目录
+            part_path.unlink(missing_ok=True)
+            MediaProcessor._validator_path(part_path).unlink(missing_ok=True)
             raise
 
     @staticmethod
@@ -114,77 +551,47 @@ class MediaProcessor:
         srt_path = Path(srt_path).resolve()
         output_path = Path(output_path).resolve()
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        FileUtils.ensure_dir(output_path.parent)
         ffmpeg_path = SystemUtils.get_ffmpeg_path()
 
         try:
-            original_cwd = os.getcwd()
-            output_dir = output_path.parent
-            os.chdir(output_dir)
-
-            video_rel = os.path.relpath(video_path, output_dir)
-            srt_rel = os.path.relpath(srt_path, output_dir)
-            output_rel = output_path.name
-
-            video_rel = video_rel.replace('\\', '/')
-            srt_rel = srt_rel.replace('\\', '/')
-
             video_ext = video_path.suffix.lower()
 
-            if os.name == 'nt':
-                if video_ext in ['.mp4', '.mov', '.m4v']:
-                    cmd = f'{ffmpeg_path} -y -i "{video_rel}" -i "{srt_rel}" -c:v copy -c:a copy -c:s mov_text -metadata:s:s:0 language=chi -disposition:s:0 default -map 0:v -map 0:a? -map 1:s "{output_rel}"'
-                elif video_ext in ['.mkv']:
-                    cmd = f'{ffmpeg_path} -y -i "{video_rel}" -i "{srt_rel}" -c:v copy -c:a copy -c:s srt -metadata:s:s:0 language=chi -disposition:s:0 default -map 0:v -map 0:a? -map 1:s "{output_rel}"'
-                else:
-                    cmd = f'{ffmpeg_path} -y -i "{video_rel}" -i "{srt_rel}" -c:v copy -c:a copy -c:s ass -metadata:s:s:0 language=chi -disposition:s:0 default -map 0:v -map 0:a? -map 1:s "{output_rel}"'
-
-                encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-                proc = subprocess.run(cmd, shell=True, capture_output=True, text=True, encoding=encoding, errors='ignore')
-                if proc.returncode != 0:
-                    raise RuntimeError(
-                        f"Command failed: {cmd}\n"
-                        f"stdout:\n{proc.stdout}\n"
-                        f"stderr:\n{proc.stderr}"
-                    )
+            if video_ext in ['.mp4', '.mov', '.m4v']:
+                cmd = [
+                    ffmpeg_path, "-y", "-i", str(video_path), "-i", str(srt_path),
+                    "-c:v", "copy", "-c:a", "copy", "-c:s", "mov_text",
+                    "-metadata:s:s:0", "language=chi",
+                    "-disposition:s:0", "default",
+                    "-map", "0:v", "-map", "0:a?", "-map", "1:s",
+                    str(output_path)
+                ]
+            elif video_ext in ['.mkv']:
+                cmd = [
+                    ffmpeg_path, "-y", "-i", str(video_path), "-i", str(srt_path),
+                    "-c:v", "copy", "-c:a", "copy", "-c:s", "srt",
+                    "-metadata:s:s:0", "language=chi",
+                    "-disposition:s:0", "default",
+                    "-map", "0:v", "-map", "0:a?", "-map", "1:s",
+                    str(output_path)
+                ]
             else:
-                if video_ext in ['.mp4', '.mov', '.m4v']:
-                    cmd = [
-                        ffmpeg_path, "-y", "-i", video_rel, "-i", srt_rel,
-                        "-c:v", "copy", "-c:a", "copy", "-c:s", "mov_text",
-                        "-metadata:s:s:0", "language=chi",
-                        "-disposition:s:0", "default",
-                        "-map", "0:v", "-map", "0:a?", "-map", "1:s",
-                        output_rel
-                    ]
-                elif video_ext in ['.mkv']:
-                    cmd = [
-                        ffmpeg_path, "-y", "-i", video_rel, "-i", srt_rel,
-                        "-c:v", "copy", "-c:a", "copy", "-c:s", "srt",
-                        "-metadata:s:s:0", "language=chi",
-                        "-disposition:s:0", "default",
-                        "-map", "0:v", "-map", "0:a?", "-map", "1:s",
-                        output_rel
-                    ]
-                else:
-                    cmd = [
-                        ffmpeg_path, "-y", "-i", video_rel, "-i", srt_rel,
-                        "-c:v", "copy", "-c:a", "copy", "-c:s", "ass",
-                        "-metadata:s:s:0", "language=chi",
-                        "-disposition:s:0", "default",
-                        "-map", "0:v", "-map", "0:a?", "-map", "1:s",
-                        output_rel
-                    ]
+                cmd = [
+                    ffmpeg_path, "-y", "-i", str(video_path), "-i", str(srt_path),
+                    "-c:v", "copy", "-c:a", "copy", "-c:s", "ass",
+                    "-metadata:s:s:0", "language=chi",
+                    "-disposition:s:0", "default",
+                    "-map", "0:v", "-map", "0:a?", "-map", "1:s",
+                    str(output_path)
+                ]
 
-                SystemUtils.run_cmd(cmd)
+            SystemUtils.run_cmd(cmd)
 
             Logger.info(f"软字幕视频生成成功: {output_path}")
 
         except Exception as e:
             Logger.error(f"软字幕视频生成失败: {e}")
             raise
-        finally:
-            os.chdir(original_cwd)
 
     @staticmethod
     def get_video_width(ffmpeg_path: str, video_path: str) -> int:
@@ -192,40 +599,35 @@ class MediaProcessor:
         获取视频宽度
 
         Args:
-            ffmpeg_path: FFmpeg路径
+            ffmpeg_path: FFmpeg路径（保留参数以兼容旧调用，探测使用 ffprobe）
             video_path: 视频文件路径
 
         Returns:
             int: 视频宽度
         """
-        probe_cmd = [ffmpeg_path, "-i", video_path, "-hide_banner"]
         video_width = 720
 
         try:
-            # 在 Windows 系统上使用 GBK 编码，在其他系统上使用 UTF-8
-            encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-            probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-
-            # 检查 probe_result 是否有效
-            if probe_result is None or probe_result.stderr is None:
-                Logger.warning(f"无法获取视频信息: {video_path}，使用默认宽度 720")
-                return video_width
-
-            for line in probe_result.stderr.split('\n'):
-                if 'Video:' in line and 'x' in line:
-                    match = re.search(r'(\d{3,5})x(\d{3,5})', line)
-                    if match:
-                        video_width = int(match.group(1))
-                    break
+            probe = MediaProcessor._probe(Path(video_path))
+            for stream in probe["streams"]:
+                if stream.get("codec_type") == "video" and stream.get("width"):
+                    return int(stream["width"])
 
-        except (UnicodeDecodeError, AttributeError, Exception) as e:
+            # 文件头中没有宽度信息时，解封装数据包获取
+            width = MediaProcessor._demux_probe(Path(video_path)).get("width")
+            if width:
+                return int(width)
+
+            Logger.warning(f"无法获取视频信息: {video_path}，使用默认宽度 720")
+
+        except Exception as e:
             Logger.warning(f"获取视频宽度时出错: {video_path}, 错误: {e}，使用默认宽度 720")
-            video_width = 720
 
         return video_width
 
     @staticmethod
-    def burn_hardsub(video_path: Path, srt_path: Path, output_path: Path, subtitle_bottom_margin: int = 20):
+    def burn_hardsub(video_path: Path, srt_path: Path, output_path: Path, subtitle_bottom_margin: int = 20,
+                     threads: Optional[int] = None, fragmented: bool = False):
         """
         生成硬字幕视频（将字幕直接烧录到视频画面中）
 
@@ -234,6 +636,8 @@ class MediaProcessor:
             srt_path: SRT字幕文件路径
             output_path: 输出视频文件路径
             subtitle_bottom_margin: 字幕下沿距离（像素），默认为0
+            threads: 编码线程数（默认由 batch 分配，单独调用时由 ffmpeg 决定）
+            fragmented: 是否输出分片 MP4（默认 False，使用 faststart）
         """
         from utils.subtitle_generator import SubtitleGenerator
 
@@ -241,7 +645,7 @@ class MediaProcessor:
         srt_path = Path(srt_path).resolve()
         output_path = Path(output_path).resolve()
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        FileUtils.ensure_dir(output_path.parent)
         ffmpeg_path = SystemUtils.get_ffmpeg_path()
 
         try:
@@ -259,83 +663,239 @@ class MediaProcessor:
             if not temp_ass_path.exists():
                 raise RuntimeError(f"ASS字幕文件创建失败: {temp_ass_path}")
 
-            video_abs = str(video_path.resolve())
-            output_abs = str(output_path.resolve())
-            temp_ass_abs = str(temp_ass_path.resolve())
+            print(f"输入视频: {video_path}")
+            print(f"ASS字幕: {temp_ass_path}")
+            print(f"输出视频: {output_path}")
 
-            print(f"输入视频: {video_abs}")
-            print(f"ASS字幕: {temp_ass_abs}")
-            print(f"输出视频: {output_abs}")
+            # 读取 ASS 文件内容进行调试
+            with open(temp_ass_path, 'r', encoding='utf-8') as f:
+                ass_content = f.read()
+            Logger.info(f"ASS 文件内容（前500字符）:\n{ass_content[:500]}")
 
-            original_cwd = os.getcwd()
+            # 滤镜参数中使用转义后的绝对路径，无需切换工作目录
+            ass_filter_path = _escape_filter_path(temp_ass_path)
 
-            try:
-                output_dir = output_path.parent
-                os.chdir(output_dir)
+            # 优先使用硬件编码器，失败时退回 libx264；
+            # 编码器能正常初始化但 subtitles 滤镜失败时，再用同一编码器尝试 ass 滤镜
+            encoding = 'gbk' if os.name == 'nt' else 'utf-8'
+            for input_args, encoder_args, filter_suffix in SystemUtils.get_video_encode_plans():
+                for subtitle_filter in ("subtitles", "ass"):
+                    cmd = [
+                        ffmpeg_path, "-y", *input_args, "-i", str(video_path),
+                        "-vf", f"{subtitle_filter}={ass_filter_path}{filter_suffix}",
+                        "-c:a", "copy", *encoder_args,
+                        *MediaProcessor._encoder_thread_args(encoder_args[1], threads),
+                        *_movflags_args(fragmented),
+                        str(output_path)
+                    ]
+                    Logger.info(f"执行 FFmpeg 命令: {' '.join(cmd)}")
+                    print(f"执行命令: {' '.join(cmd)}")
+                    proc = subprocess.run(cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
+                    Logger.info(f"FFmpeg stdout: {proc.stdout}")
+                    if proc.stderr:
+                        Logger.info(f"FFmpeg stderr: {proc.stderr}")
+                    if proc.returncode == 0:
+                        break
+                    Logger.warning(f"{subtitle_filter} 滤镜 + {encoder_args[1]} 编码失败")
+                    if _is_encoder_failure(proc.stderr):
+                        # 编码器本身不可用，换字幕滤镜无意义，直接尝试下一个编码方案
+                        break
+                if proc.returncode == 0:
+                    break
 
-                # 检查视频文件是否在输出目录中
-                video_in_output_dir = video_path.parent == output_dir
+            if proc.returncode != 0:
+                raise RuntimeError(
+                    f"Command failed: {' '.join(cmd) if isinstance(cmd, list) else cmd}\n"
+                    f"stdout:\n{proc.stdout}\n"
+                    f"stderr:\n{proc.stderr}"
+                )
+        finally:
+            if 'temp_ass_path' in locals() and temp_ass_path.exists():
+                temp_ass_path.unlink()
 
-                if video_in_output_dir:
-                    # 视频文件在输出目录中，使用相对路径
-                    video_rel = video_path.name
-                else:
-                    # 视频文件不在输出目录中，使用绝对路径
-                    video_rel = str(video_path.resolve())
+            Logger.info(f"硬字幕视频生成成功: {output_path}")
 
-                output_rel = output_path.name
-                temp_ass_rel = temp_ass_path.name
+    @staticmethod
+    def burn_hardsub_and_mux(video_path: Path, srt_path: Path, audio_path: Path, output_path: Path,
+                             subtitle_bottom_margin: int = 20, use_shortest: bool = True,
+                             audio_volume: float = 1.0, keep_original_audio: bool = True,
+                             fragmented: bool = False):
+        """
+        一次 ffmpeg 调用完成字幕烧录与音频合并（等价于 merge_audio_video + burn_hardsub）
 
-                # 读取 ASS 文件内容进行调试
-                with open(temp_ass_path, 'r', encoding='utf-8') as f:
-                    ass_content = f.read()
-                Logger.info(f"ASS 文件内容（前500字符）:\n{ass_content[:500]}")
+        视频只解码、编码一次，且不产生中间合并文件。
 
-                # 使用更兼容的字幕滤镜参数
-                cmd = [
-                    ffmpeg_path, "-y", "-i", video_rel,
-                    "-vf", f"subtitles={temp_ass_rel}",
-                    "-c:a", "copy", "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                    "-movflags", "+faststart",
-                    output_rel
-                ]
-                Logger.info(f"执行 FFmpeg 命令: {' '.join(cmd)}")
-                print(f"执行命令: {' '.join(cmd)}")
-                encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-                proc = subprocess.run(cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-                Logger.info(f"FFmpeg stdout: {proc.stdout}")
-                if proc.stderr:
-                    Logger.info(f"FFmpeg stderr: {proc.stderr}")
+        Args:
+            video_path: 视频文件路径
+            srt_path: SRT字幕文件路径
+            audio_path: 音频文件路径
+            output_path: 输出视频文件路径
+            subtitle_bottom_margin: 字幕下沿距离（像素）
+            use_shortest: 是否使用最短时长
+            audio_volume: 新音频音量倍数
+            keep_original_audio: 是否保留原视频音频（True 混合，False 替换）
+            fragmented: 是否输出分片 MP4（默认 False，使用 faststart）
+        """
+        from utils.subtitle_generator import SubtitleGenerator
 
-                # 如果使用 subtitles 滤镜失败，尝试使用 ass 滤镜
-                if proc.returncode != 0:
-                    Logger.warning("subtitles 滤镜失败，尝试使用 ass 滤镜")
+        video_path = Path(video_path).resolve()
+        srt_path = Path(srt_path).resolve()
+        audio_path = Path(audio_path).resolve()
+        output_path = Path(output_path).resolve()
+
+        FileUtils.ensure_dir(output_path.parent)
+        ffmpeg_path = SystemUtils.get_ffmpeg_path()
+
+        temp_ass_path = None
+        try:
+            if not srt_path.exists():
+                raise RuntimeError(f"字幕文件不存在: {srt_path}")
+
+            video_width = MediaProcessor.get_video_width(ffmpeg_path, str(video_path))
+            platform_suffix = "_windows" if os.name == 'nt' else "_linux"
+            temp_ass_path = SubtitleGenerator.create_ass_subtitle(
+                srt_path, output_path.parent, video_width, platform_suffix, subtitle_bottom_margin
+            )
+            if not temp_ass_path.exists():
+                raise RuntimeError(f"ASS字幕文件创建失败: {temp_ass_path}")
+
+            ass_filter_path = _escape_filter_path(temp_ass_path)
+            has_audio = MediaProcessor.has_audio_stream(video_path)
+
+            # 音频部分的滤镜图
+            if keep_original_audio and has_audio:
+                Logger.info("保留原视频音频，与新音频混合")
+                audio_graph = _amix_graph(audio_volume)
+            else:
+                Logger.info("使用新音频替换原视频音频" if has_audio else "原视频无音频，直接添加新音频")
+                audio_graph = f"[1:a]volume={audio_volume}[aout]"
+
+            # 优先使用硬件编码器，失败时退回 libx264；
+            # 编码器能正常初始化但 subtitles 滤镜失败时，再用同一编码器尝试 ass 滤镜
+            encoding = 'gbk' if os.name == 'nt' else 'utf-8'
+            for input_args, encoder_args, filter_suffix in SystemUtils.get_video_encode_plans():
+                for subtitle_filter in ("subtitles", "ass"):
                     cmd = [
-                        ffmpeg_path, "-y", "-i", video_rel,
-                        "-vf", f"ass={temp_ass_rel}",
-                        "-c:a", "copy", "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                        "-movflags", "+faststart",
-                        output_rel
+                        ffmpeg_path, "-y", *input_args, "-i", str(video_path), "-i", str(audio_path),
+                        "-filter_complex", f"[0:v]{subtitle_filter}={ass_filter_path}{filter_suffix}[vout];{audio_graph}",
+                        "-map", "[vout]", "-map", "[aout]",
+                        *encoder_args,
+                        *MediaProcessor._encoder_thread_args(encoder_args[1]),
+                        "-c:a", "aac"
                     ]
-                    Logger.info(f"执行备用 FFmpeg 命令: {' '.join(cmd)}")
+                    if use_shortest:
+                        cmd.append("-shortest")
+                    cmd.extend([*_movflags_args(fragmented), str(output_path)])
+
+                    Logger.info(f"执行 FFmpeg 命令: {' '.join(cmd)}")
                     proc = subprocess.run(cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-                    Logger.info(f"备用 FFmpeg stdout: {proc.stdout}")
-                    if proc.stderr:
-                        Logger.info(f"备用 FFmpeg stderr: {proc.stderr}")
-            finally:
-                os.chdir(original_cwd)
+                    if proc.returncode == 0:
+                        break
+                    Logger.warning(f"{subtitle_filter} 滤镜 + {encoder_args[1]} 编码失败: {proc.stderr[-500:]}")
+                    if _is_encoder_failure(proc.stderr):
+                        # 编码器本身不可用，换字幕滤镜无意义，直接尝试下一个编码方案
+                        break
+                if proc.returncode == 0:
+                    break
 
             if proc.returncode != 0:
                 raise RuntimeError(
-                    f"Command failed: {' '.join(cmd) if isinstance(cmd, list) else cmd}\n"
+                    f"Command failed: {' '.join(cmd)}\n"
                     f"stdout:\n{proc.stdout}\n"
                     f"stderr:\n{proc.stderr}"
                 )
+
+            Logger.info(f"硬字幕与音频合并成功: {output_path}")
         finally:
-            if 'temp_ass_path' in locals() and temp_ass_path.exists():
+            if temp_ass_path is not None and temp_ass_path.exists():
                 temp_ass_path.unlink()
 
-            Logger.info(f"硬字幕视频生成成功: {output_path}")
+    @staticmethod
+    def burn_hardsub_ladder(video_path: Path, srt_path: Path, outputs: List[Tuple[int, int, int, Path]],
+                            subtitle_bottom_margin: int = 20, fragmented: bool = False):
+        """
+        一次解码生成多个分辨率/码率的硬字幕视频
+
+        字幕烧录后通过 split 滤镜分流，每路单独缩放并编码，
+        避免多次调用 burn_hardsub 时重复解码源视频。
+
+        Args:
+            video_path: 视频文件路径
+            srt_path: SRT字幕文件路径
+            outputs: 输出列表，每项为 (宽, 高, crf, 输出路径)；宽或高为 -2 时按比例缩放
+            subtitle_bottom_margin: 字幕下沿距离（像素）
+            fragmented: 是否输出分片 MP4（默认 False，使用 faststart）
+        """
+        from utils.subtitle_generator import SubtitleGenerator
+
+        if not outputs:
+            return
+
+        video_path = Path(video_path).resolve()
+        srt_path = Path(srt_path).resolve()
+        outputs = [(width, height, crf, Path(path).resolve()) for width, height, crf, path in outputs]
+        for _, _, _, path in outputs:
+            FileUtils.ensure_dir(path.parent)
+
+        ffmpeg_path = SystemUtils.get_ffmpeg_path()
+
+        temp_ass_path = None
+        try:
+            if not srt_path.exists():
+                raise RuntimeError(f"字幕文件不存在: {srt_path}")
+
+            video_width = MediaProcessor.get_video_width(ffmpeg_path, str(video_path))
+            platform_suffix = "_windows" if os.name == 'nt' else "_linux"
+            temp_ass_path = SubtitleGenerator.create_ass_subtitle(
+                srt_path, outputs[0][3].parent, video_width, platform_suffix, subtitle_bottom_margin
+            )
+            if not temp_ass_path.exists():
+                raise RuntimeError(f"ASS字幕文件创建失败: {temp_ass_path}")
+
+            ass_filter_path = _escape_filter_path(temp_ass_path)
+            count = len(outputs)
+            split_labels = "".join(f"[s{i}]" for i in range(count))
+            scale_graph = ";".join(
+                f"[s{i}]scale={width}:{height}[o{i}]" for i, (width, height, _, _) in enumerate(outputs)
+            )
+
+            # 每路输出的映射与编码参数
+            output_args = []
+            for i, (_, _, crf, path) in enumerate(outputs):
+                output_args.extend([
+                    "-map", f"[o{i}]", "-map", "0:a?",
+                    "-c:a", "copy", "-c:v", "libx264", "-preset", "fast", "-crf", str(crf),
+                    *MediaProcessor._encoder_thread_args("libx264"),
+                    *_movflags_args(fragmented),
+                    str(path)
+                ])
+
+            # 如果使用 subtitles 滤镜失败，尝试使用 ass 滤镜
+            encoding = 'gbk' if os.name == 'nt' else 'utf-8'
+            for subtitle_filter in ("subtitles", "ass"):
+                cmd = [
+                    ffmpeg_path, "-y", "-i", str(video_path),
+                    "-filter_complex",
+                    f"[0:v]{subtitle_filter}={ass_filter_path},split={count}{split_labels};{scale_graph}",
+                    *output_args
+                ]
+                Logger.info(f"执行 FFmpeg 命令: {' '.join(cmd)}")
+                proc = subprocess.run(cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
+                if proc.returncode == 0:
+                    break
+                Logger.warning(f"{subtitle_filter} 滤镜失败: {proc.stderr[-500:]}")
+
+            if proc.returncode != 0:
+                raise RuntimeError(
+                    f"Command failed: {' '.join(cmd)}\n"
+                    f"stdout:\n{proc.stdout}\n"
+                    f"stderr:\n{proc.stderr}"
+                )
+
+            Logger.info(f"多分辨率硬字幕视频生成成功: {[str(path) for _, _, _, path in outputs]}")
+        finally:
+            if temp_ass_path is not None and temp_ass_path.exists():
+                temp_ass_path.unlink()
 
     @staticmethod
     def get_media_duration(file_path: Path) -> float:
@@ -349,20 +909,21 @@ class MediaProcessor:
             float: 媒体时长（秒）
         """
         file_path = Path(file_path).resolve()
-        ffmpeg_path = SystemUtils.get_ffmpeg_path()
-
-        cmd = [
-            ffmpeg_path, "-i", str(file_path), "-f", "null", "-"
-        ]
 
         try:
-            # 在 Windows 系统上使用 GBK 编码，在其他系统上使用 UTF-8
-            encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-            result = subprocess.run(cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-            duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2}\.\d{2})', result.stderr)
-            if duration_match:
-                hours, minutes, seconds = map(float, duration_match.groups())
-                return hours * 3600 + minutes * 60 + seconds
+            probe = MediaProcessor._probe(file_path)
+            duration = probe["format"].get("duration")
+            if duration is None:
+                # 封装层没有时长时，退回到各流时长的最大值
+                stream_durations = [float(stream["duration"]) for stream in probe["streams"] if stream.get("duration")]
+                duration = max(stream_durations) if stream_durations else None
+
+            if duration is None:
+                # 文件头缺少时长信息时，解封装统计视频包数估算（不解码）
+                duration = MediaProcessor._estimate_duration_by_packets(file_path)
+
+            if duration is not None:
+                return float(duration)
             else:
                 Logger.warning(f"无法获取媒体时长: {file_path}")
                 return 0.0
@@ -370,6 +931,32 @@ class MediaProcessor:
             Logger.error(f"获取媒体时长失败: {e}")
             return 0.0
 
+    @staticmethod
+    def _estimate_duration_by_packets(file_path: Path) -> Optional[float]:
+        """
+        通过解封装统计的视频包数与平均帧率估算时长
+
+        Args:
+            file_path: 媒体文件路径
+
+        Returns:
+            Optional[float]: 估算时长（秒），无法估算时返回 None
+        """
+        info = MediaProcessor._demux_probe(file_path)
+        for key in ("duration", "format_duration"):
+            if info.get(key) not in (None, "N/A"):
+                return float(info[key])
+
+        packets = info.get("nb_read_packets")
+        numerator, _, denominator = str(info.get("avg_frame_rate", "0/0")).partition("/")
+        try:
+            frame_rate = float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            return None
+        if packets and frame_rate > 0:
+            return int(packets) / frame_rate
+        return None
+
     @staticmethod
     def merge_audio_video(video_path: Path, audio_path: Path, output_path: Path, use_shortest: bool = True, audio_volume: float = 1.0, keep_original_audio: bool = True):
         """
@@ -389,120 +976,146 @@ class MediaProcessor:
 
         ffmpeg_path = SystemUtils.get_ffmpeg_path()
 
-        original_cwd = os.getcwd()
-
         try:
-            output_dir = output_path.parent
-            os.chdir(output_dir)
-
-            video_rel = os.path.relpath(video_path, output_dir)
-            audio_rel = os.path.relpath(audio_path, output_dir)
-            output_rel = output_path.name
-
-            video_rel = video_rel.replace('\\', '/')
-            audio_rel = audio_rel.replace('\\', '/')
-
             # 检查原视频是否有音频流
-            probe_cmd = [ffmpeg_path, "-i", str(video_path), "-hide_banner"]
-            # 在 Windows 系统上使用 GBK 编码，在其他系统上使用 UTF-8
-            encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-            probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-            has_audio = 'Audio:' in probe_result.stderr
+            has_audio = MediaProcessor.has_audio_stream(video_path)
 
             # 构建命令
-            if os.name == 'nt':  # Windows
-                if keep_original_audio and has_audio:
-                    # 保留原音频并混合
-                    Logger.info("保留原视频音频，与新音频混合")
-                    # 只调整新音频的音量，然后混合
-                    if audio_volume != 1.0:
-                        cmd_str = f'{ffmpeg_path} -y -i "{video_rel}" -i "{audio_rel}" -filter_complex "[1:a]volume={audio_volume}[a1_vol];[0:a][a1_vol]amix=inputs=2:duration=first:dropout_transition=2[aout]" -map 0:v:0 -map "[aout]" -c:v copy -c:a aac'
-                        Logger.info(f"应用新音频音量调整: {audio_volume}x")
-                    else:
-                        cmd_str = f'{ffmpeg_path} -y -i "{video_rel}" -i "{audio_rel}" -filter_complex "[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2[aout]" -map 0:v:0 -map "[aout]" -c:v copy -c:a aac'
-                    if use_shortest:
-                        cmd_str += ' -shortest'
-                    cmd_str += f' "{output_rel}"'
-                else:
-                    # 替换原音频
-                    if has_audio:
-                        Logger.info("使用新音频替换原视频音频")
-                    else:
-                        Logger.info("原视频无音频，直接添加新音频")
-                    cmd_str = f'{ffmpeg_path} -y -i "{video_rel}" -i "{audio_rel}" -c:v copy -c:a aac -map 0:v:0 -map 1:a:0'
-                    
-                    # 如果音量不是1.0，添加音量滤镜
-                    if audio_volume != 1.0:
-                        cmd_str += f' -filter:a "volume={audio_volume}"'
-                        Logger.info(f"应用音频音量调整: {audio_volume}x")
-                    
-                    if use_shortest:
-                        cmd_str += ' -shortest'
-                    cmd_str += f' "{output_rel}"'
-                
-                # 直接执行命令
-                encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-                proc = subprocess.run(cmd_str, shell=True, capture_output=True, text=True, encoding=encoding, errors='ignore')
-                if proc.returncode != 0:
-                    raise RuntimeError(
-                        f"Command failed: {cmd_str}\n"
-                        f"stdout:\n{proc.stdout}\n"
-                        f"stderr:\n{proc.stderr}"
-                    )
+            if keep_original_audio and has_audio:
+                # 保留原音频并混合
+                Logger.info("保留原视频音频，与新音频混合")
+                # 只调整新音频的音量，然后混合（同一个滤镜图内完成）
+                cmd = [
+                    ffmpeg_path, "-y", *MediaProcessor._decoder_thread_args(),
+                    "-i", str(video_path), "-i", str(audio_path),
+                    "-filter_complex", _amix_graph(audio_volume),
+                    "-map", "0:v:0", "-map", "[aout]",
+                    "-c:v", "copy", "-c:a", "aac"
+                ]
+                if audio_volume != 1.0:
+                    Logger.info(f"应用新音频音量调整: {audio_volume}x")
+                if use_shortest:
+                    cmd.append("-shortest")
+                cmd.append(str(output_path))
             else:
-                # 在 Linux/Mac 上使用列表命令
-                if keep_original_audio and has_audio:
-                    # 保留原音频并混合
-                    Logger.info("保留原视频音频，与新音频混合")
-                    # 只调整新音频的音量，然后混合
-                    if audio_volume != 1.0:
-                        cmd = [
-                            ffmpeg_path, "-y", "-i", video_rel, "-i", audio_rel,
-                            "-filter_complex", f"[1:a]volume={audio_volume}[a1_vol];[0:a][a1_vol]amix=inputs=2:duration=first:dropout_transition=2[aout]",
-                            "-map", "0:v:0", "-map", "[aout]",
-                            "-c:v", "copy", "-c:a", "aac"
-                        ]
-                        Logger.info(f"应用新音频音量调整: {audio_volume}x")
-                    else:
-                        cmd = [
-                            ffmpeg_path, "-y", "-i", video_rel, "-i", audio_rel,
-                            "-filter_complex", f"[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2[aout]",
-                            "-map", "0:v:0", "-map", "[aout]",
-                            "-c:v", "copy", "-c:a", "aac"
-                        ]
-                    if use_shortest:
-                        cmd.append("-shortest")
-                    cmd.append(output_rel)
+                # 替换原音频
+                if has_audio:
+                    Logger.info("使用新音频替换原视频音频")
                 else:
-                    # 替换原音频
-                    if has_audio:
-                        Logger.info("使用新音频替换原视频音频")
-                    else:
-                        Logger.info("原视频无音频，直接添加新音频")
-                    cmd = [
-                        ffmpeg_path, "-y", "-i", video_rel, "-i", audio_rel,
-                        "-c:v", "copy", "-c:a", "aac", "-map", "0:v:0", "-map", "1:a:0"
-                    ]
-                    
-                    # 如果音量不是1.0，添加音量滤镜
-                    if audio_volume != 1.0:
-                        cmd.extend(["-filter:a", f"volume={audio_volume}"])
-                        Logger.info(f"应用音频音量调整: {audio_volume}x")
-                    
-                    # 根据参数决定是否添加 -shortest
-                    if use_shortest:
-                        cmd.append("-shortest")
-                    
-                    cmd.append(output_rel)
-                
-                SystemUtils.run_cmd(cmd)
+                    Logger.info("原视频无音频，直接添加新音频")
+                cmd = [
+                    ffmpeg_path, "-y", *MediaProcessor._decoder_thread_args(),
+                    "-i", str(video_path), "-i", str(audio_path),
+                    "-c:v", "copy", "-c:a", "aac", "-map", "0:v:0", "-map", "1:a:0"
+                ]
+
+                # 如果音量不是1.0，添加音量滤镜
+                if audio_volume != 1.0:
+                    cmd.extend(["-filter:a", f"volume={audio_volume}"])
+                    Logger.info(f"应用音频音量调整: {audio_volume}x")
+
+                # 根据参数决定是否添加 -shortest
+                if use_shortest:
+                    cmd.append("-shortest")
+
+                cmd.append(str(output_path))
+
+            SystemUtils.run_cmd(cmd)
             Logger.info(f"音视频合并成功: {output_path}")
 
         except Exception as e:
             Logger.error(f"音视频合并失败: {e}")
             raise
-        finally:
-            os.chdir(original_cwd)
+
+    @staticmethod
+    def merge_batch(jobs: Iterable[tuple], max_workers: int = 2) -> List[Any]:
+        """
+        并行合并多组音视频
+
+        视频流直接复制（-c:v copy），合并主要受磁盘 I/O 限制，少量并行即可重叠各任务的 I/O 等待。
+
+        Args:
+            jobs: 参数元组列表，每个元组对应一次 merge_audio_video(*args) 调用，
+                  如 (video_path, audio_path, output_path)
+            max_workers: 并行数（默认2）
+
+        Returns:
+            List[Any]: 按 jobs 顺序排列的执行结果
+        """
+        return MediaProcessor.batch(MediaProcessor.merge_audio_video, jobs, workers=max_workers)
+
+    @staticmethod
+    def _copy_unchanged(src_path: Path, dst_path: Path):
+        """
+        输入已满足目标参数时直接复制文件，跳过 ffmpeg 重新编码
+
+        不使用硬链接：后续 ffmpeg -y 覆盖输出时会原地截断，硬链接会连带修改源文件。
+
+        Args:
+            src_path: 输入文件路径
+            dst_path: 输出文件路径
+        """
+        if src_path != dst_path:
+            FileUtils.ensure_dir(dst_path.parent)
+            shutil.copyfile(src_path, dst_path)
+
+    @staticmethod
+    def _matching_audio_stream(audio_path: Path, output_path: Path) -> Optional[dict]:
+        """
+        获取可直接复制到输出路径的音频流信息
+
+        输入与输出扩展名一致，且唯一的音频流正是 ffmpeg 按输出扩展名默认使用的编码时，
+        复制文件与重新编码得到的格式相同。
+
+        Args:
+            audio_path: 输入音频文件路径
+            output_path: 输出音频文件路径
+
+        Returns:
+            Optional[dict]: 音频流信息，格式不一致时返回 None
+        """
+        suffix = output_path.suffix.lower()
+        if audio_path.suffix.lower() != suffix or suffix not in _DEFAULT_AUDIO_CODECS:
+            return None
+
+        audio_streams = [
+            stream for stream in MediaProcessor._probe(audio_path)["streams"]
+            if stream.get("codec_type") == "audio"
+        ]
+        if len(audio_streams) != 1 or audio_streams[0].get("codec_name") != _DEFAULT_AUDIO_CODECS[suffix]:
+            return None
+        return audio_streams[0]
+
+    @staticmethod
+    def _is_normalized_audio(audio_path: Path, output_path: Path, sample_rate: int, channels: int,
+                             min_bit_rate: int, max_bit_rate: int) -> bool:
+        """
+        判断音频是否已经是目标格式（输出扩展名对应的默认编码、目标采样率与声道数，有损编码的比特率在目标附近）
+
+        Args:
+            audio_path: 输入音频文件路径
+            output_path: 输出音频文件路径（扩展名需与输入一致，否则封装格式不同）
+            sample_rate: 目标采样率
+            channels: 目标声道数
+            min_bit_rate: 允许的最小比特率（PCM 不检查比特率）
+            max_bit_rate: 允许的最大比特率（PCM 不检查比特率）
+
+        Returns:
+            bool: 是否可以跳过重新编码
+        """
+        stream = MediaProcessor._matching_audio_stream(audio_path, output_path)
+        if stream is None:
+            return False
+
+        try:
+            return (
+                int(stream.get("sample_rate", 0)) == sample_rate
+                and int(stream.get("channels", 0)) == channels
+                and (stream["codec_name"].startswith("pcm_")
+                     or min_bit_rate <= int(stream.get("bit_rate", 0)) <= max_bit_rate)
+            )
+        except (TypeError, ValueError):
+            return False
 
     @staticmethod
     def adjust_audio_speed(audio_path: Path, output_path: Path, speed_factor: float) -> Path:
@@ -520,51 +1133,30 @@ class MediaProcessor:
         audio_path = Path(audio_path).resolve()
         output_path = Path(output_path).resolve()
 
+        # 语速不变且格式一致时直接复制；格式不同（如 mp3 输入、wav 输出）时仍需转码，只是不加 atempo
+        if speed_factor == 1.0 and MediaProcessor._matching_audio_stream(audio_path, output_path) is not None:
+            MediaProcessor._copy_unchanged(audio_path, output_path)
+            Logger.info(f"语速倍数为 1.0，跳过调整: {output_path}")
+            return output_path
+
         ffmpeg_path = SystemUtils.get_ffmpeg_path()
 
         # 使用 atempo 滤镜调整音频速度
-        # atempo 滤镜的范围是 0.5 到 100.0
-        # 如果需要的倍数超出范围，可以级联多个 atempo 滤镜
+        # 单个 atempo 的推荐范围是 0.5 到 2.0，超出范围时级联多个 atempo 滤镜
         if speed_factor < 0.5 or speed_factor > 2.0:
-            Logger.warning(f"语速调整倍数 {speed_factor} 超出推荐范围 (0.5-2.0)，可能影响音质")
-
-        original_cwd = os.getcwd()
+            Logger.warning(f"语速调整倍数 {speed_factor} 超出推荐范围 (0.5-2.0)，将级联多个 atempo 滤镜")
 
         try:
-            output_dir = output_path.parent
-            os.chdir(output_dir)
-
-            audio_rel = os.path.relpath(audio_path, output_dir)
-            output_rel = output_path.name
-
-            audio_rel = audio_rel.replace('\\', '/')
-
-            if os.name == 'nt':  # Windows
-                # 构建FFmpeg命令
-                cmd_str = f'{ffmpeg_path} -y -i "{audio_rel}" -filter:a "atempo={speed_factor}" "{output_rel}"'
-
-                Logger.info(f"调整音频语速: {speed_factor}x")
-                Logger.info(f"执行命令: {cmd_str}")
-
-                # 执行命令
-                encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-                proc = subprocess.run(cmd_str, shell=True, capture_output=True, text=True, encoding=encoding, errors='ignore')
-                if proc.returncode != 0:
-                    raise RuntimeError(
-                        f"Command failed: {cmd_str}\n"
-                        f"stdout:\n{proc.stdout}\n"
-                        f"stderr:\n{proc.stderr}"
-                    )
-            else:
-                # Linux/Mac 命令
-                cmd = [
-                    ffmpeg_path, "-y", "-i", audio_rel,
-                    "-filter:a", f"atempo={speed_factor}",
-                    output_rel
-                ]
+            # 列表形式调用，所有系统通用，无需经过 shell
+            filter_args = ["-filter:a", _atempo_chain(speed_factor)] if speed_factor != 1.0 else []
+            cmd = [
+                ffmpeg_path, "-y", "-i", str(audio_path),
+                *filter_args,
+                str(output_path)
+            ]
 
-                Logger.info(f"调整音频语速: {speed_factor}x")
-                SystemUtils.run_cmd(cmd)
+            Logger.info(f"调整音频语速: {speed_factor}x")
+            SystemUtils.run_cmd(cmd)
 
             Logger.info(f"音频语速调整成功: {output_path}")
             return output_path
@@ -572,8 +1164,6 @@ class MediaProcessor:
         except Exception as e:
             Logger.error(f"音频语速调整失败: {e}")
             raise
-        finally:
-            os.chdir(original_cwd)
 
     @staticmethod
     def normalize_audio(audio_path: Path, output_path: Optional[Path] = None) -> Path:
@@ -602,61 +1192,33 @@ class MediaProcessor:
         target_channels = 2  # 立体声
         target_bitrate = "192k"  # 192kbps
 
-        # 检查是否需要使用临时文件（输入和输出相同）
-        use_temp_file = (audio_path == output_path)
-        temp_output_path = None
-
-        if use_temp_file:
-            # 创建临时文件名
-            temp_output_path = output_path.parent / f"temp_{output_path.name}"
+        # 已经是目标格式时跳过解码与重新编码
+        if MediaProcessor._is_normalized_audio(audio_path, output_path, target_sample_rate, target_channels,
+                                               150000, 210000):
+            MediaProcessor._copy_unchanged(audio_path, output_path)
+            Logger.info(f"音频已符合标准参数，跳过重新编码: {output_path}")
+            return output_path
 
-        original_cwd = os.getcwd()
+        # 先写入同目录下的临时文件，完成后原子替换为输出文件，
+        # 输入输出相同时也不会读写同一文件，其他进程也不会看到写了一半的文件
+        # （保留原扩展名，ffmpeg 依据扩展名选择封装格式）
+        temp_output_path = output_path.parent / f"temp_{output_path.name}"
 
         try:
-            output_dir = output_path.parent
-            os.chdir(output_dir)
-
-            audio_rel = os.path.relpath(audio_path, output_dir)
-            output_rel = temp_output_path.name if use_temp_file else output_path.name
-
-            audio_rel = audio_rel.replace('\\', '/')
-
-            if os.name == 'nt':  # Windows
-                # 构建FFmpeg命令
-                cmd_str = f'{ffmpeg_path} -y -i "{audio_rel}" -ar {target_sample_rate} -ac {target_channels} -b:a {target_bitrate} "{output_rel}"'
-
-                Logger.info(f"标准化音频: {audio_path.name}")
-                Logger.info(f"  采样率: {target_sample_rate}Hz, 声道: {target_channels}, 比特率: {target_bitrate}")
-                Logger.info(f"执行命令: {cmd_str}")
-
-                # 执行命令
-                encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-                proc = subprocess.run(cmd_str, shell=True, capture_output=True, text=True, encoding=encoding, errors='ignore')
-                if proc.returncode != 0:
-                    raise RuntimeError(
-                        f"Command failed: {cmd_str}\n"
-                        f"stdout:\n{proc.stdout}\n"
-                        f"stderr:\n{proc.stderr}"
-                    )
-            else:
-                # Linux/Mac 命令
-                cmd = [
-                    ffmpeg_path, "-y", "-i", audio_rel,
-                    "-ar", str(target_sample_rate),
-                    "-ac", str(target_channels),
-                    "-b:a", target_bitrate,
-                    output_rel
-                ]
+            # 列表形式调用，所有系统通用，无需经过 shell
+            cmd = [
+                ffmpeg_path, "-y", "-i", str(audio_path),
+                "-ar", str(target_sample_rate),
+                "-ac", str(target_channels),
+                "-b:a", target_bitrate,
+                str(temp_output_path)
+            ]
 
-                Logger.info(f"标准化音频: {audio_path.name}")
-                Logger.info(f"  采样率: {target_sample_rate}Hz, 声道: {target_channels}, 比特率: {target_bitrate}")
-                SystemUtils.run_cmd(cmd)
+            Logger.info(f"标准化音频: {audio_path.name}")
+            Logger.info(f"  采样率: {target_sample_rate}Hz, 声道: {target_channels}, 比特率: {target_bitrate}")
+            SystemUtils.run_cmd(cmd)
 
-            # 如果使用了临时文件，替换原文件
-            if use_temp_file and temp_output_path and temp_output_path.exists():
-                import shutil
-                shutil.move(str(temp_output_path), str(output_path))
-                Logger.info(f"替换原文件: {output_path}")
+            os.replace(temp_output_path, output_path)
 
             Logger.info(f"音频标准化成功: {output_path}")
             return output_path
@@ -664,15 +1226,13 @@ class MediaProcessor:
         except Exception as e:
             Logger.error(f"音频标准化失败: {e}")
             # 清理临时文件
-            if temp_output_path and temp_output_path.exists():
+            if temp_output_path.exists():
                 try:
                     temp_output_path.unlink()
                     Logger.info(f"清理临时文件: {temp_output_path}")
                 except Exception as cleanup_error:
                     Logger.warning(f"清理临时文件失败: {cleanup_error}")
             raise
-        finally:
-            os.chdir(original_cwd)
 
     @staticmethod
     def merge_audio_video_with_duration(video_path: Path, audio_path: Path, output_path: Path, 
@@ -695,121 +1255,58 @@ class MediaProcessor:
 
         ffmpeg_path = SystemUtils.get_ffmpeg_path()
 
-        original_cwd = os.getcwd()
-
         try:
-            output_dir = output_path.parent
-            os.chdir(output_dir)
-
-            video_rel = os.path.relpath(video_path, output_dir)
-            audio_rel = os.path.relpath(audio_path, output_dir)
-            output_rel = output_path.name
-
-            video_rel = video_rel.replace('\\', '/')
-            audio_rel = audio_rel.replace('\\', '/')
-
             # 检查原视频是否有音频流
-            probe_cmd = [ffmpeg_path, "-i", str(video_path), "-hide_banner"]
-            # 在 Windows 系统上使用 GBK 编码，在其他系统上使用 UTF-8
-            encoding = 'gbk' if os.name == 'nt' else 'utf-8'
-            probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, encoding=encoding, errors='ignore')
-            has_audio = 'Audio:' in probe_result.stderr
+            has_audio = MediaProcessor.has_audio_stream(video_path)
 
             if extend_video:
                 # 使用 loop 和 duration 参数扩展视频
-                if keep_original_audio and has_audio:
-                    # 保留原音频并混合
-                    Logger.info("保留原视频音频，与新音频混合")
-                    # 只调整新音频的音量，然后混合
-                    if audio_volume != 1.0:
-                        cmd = [
-                            ffmpeg_path, "-y",
-                            "-stream_loop", "-1", "-i", video_rel,  # 无限循环视频
-                            "-i", audio_rel,
-                            "-filter_complex", f"[1:a]volume={audio_volume}[a1_vol];[0:a][a1_vol]amix=inputs=2:duration=first:dropout_transition=2[aout]",
-                            "-map", "0:v:0", "-map", "[aout]",
-                            "-c:v", "copy", "-c:a", "aac",
-                            "-t", str(target_duration),  # 指定总时长
-                            "-avoid_negative_ts", "make_zero",  # 避免负时间戳
-                            output_rel
-                        ]
-                        Logger.info(f"应用新音频音量调整: {audio_volume}x")
-                    else:
-                        cmd = [
-                            ffmpeg_path, "-y",
-                            "-stream_loop", "-1", "-i", video_rel,  # 无限循环视频
-                            "-i", audio_rel,
-                            "-filter_complex", f"[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2[aout]",
-                            "-map", "0:v:0", "-map", "[aout]",
-                            "-c:v", "copy", "-c:a", "aac",
-                            "-t", str(target_duration),  # 指定总时长
-                            "-avoid_negative_ts", "make_zero",  # 避免负时间戳
-                            output_rel
-                        ]
+                input_args = ["-stream_loop", "-1", "-i", str(video_path)]  # 无限循环视频
+                duration_args = [
+                    "-t", str(target_duration),  # 指定总时长
+                    "-avoid_negative_ts", "make_zero"  # 避免负时间戳
+                ]
+            else:
+                # 标准合并，使用最短时长
+                input_args = ["-i", str(video_path)]
+                duration_args = ["-shortest"]
+
+            if keep_original_audio and has_audio:
+                # 保留原音频并混合
+                Logger.info("保留原视频音频，与新音频混合")
+                # 只调整新音频的音量，然后混合（同一个滤镜图内完成）
+                cmd = [
+                    ffmpeg_path, "-y", *MediaProcessor._decoder_thread_args(), *input_args, "-i", str(audio_path),
+                    "-filter_complex", _amix_graph(audio_volume),
+                    "-map", "0:v:0", "-map", "[aout]",
+                    "-c:v", "copy", "-c:a", "aac",
+                    *duration_args,
+                    str(output_path)
+                ]
+                if audio_volume != 1.0:
+                    Logger.info(f"应用新音频音量调整: {audio_volume}x")
+            else:
+                # 替换原音频
+                if has_audio:
+                    Logger.info("使用新音频替换原视频音频")
                 else:
-                    # 替换原音频
-                    if has_audio:
-                        Logger.info("使用新音频替换原视频音频")
-                    else:
-                        Logger.info("原视频无音频，直接添加新音频")
-                    cmd = [
-                        ffmpeg_path, "-y",
-                        "-stream_loop", "-1", "-i", video_rel,  # 无限循环视频
-                        "-i", audio_rel,
-                        "-c:v", "copy", "-c:a", "aac",
-                        "-map", "0:v:0", "-map", "1:a:0",
-                        "-t", str(target_duration),  # 指定总时长
-                        "-avoid_negative_ts", "make_zero",  # 避免负时间戳
-                        output_rel
-                    ]
+                    Logger.info("原视频无音频，直接添加新音频")
+                # 如果音量不是1.0，添加音量滤镜
+                audio_args = ["-filter:a", f"volume={audio_volume}"] if audio_volume != 1.0 else []
+                if audio_args:
+                    Logger.info(f"应用音频音量调整: {audio_volume}x")
 
-                    # 如果音量不是1.0，添加音量滤镜
-                    if audio_volume != 1.0:
-                        cmd.insert(-1, "-filter:a")
-                        cmd.insert(-1, f"volume={audio_volume}")
-                        Logger.info(f"应用音频音量调整: {audio_volume}x")
+                cmd = [
+                    ffmpeg_path, "-y", *MediaProcessor._decoder_thread_args(), *input_args, "-i", str(audio_path),
+                    "-c:v", "copy", "-c:a", "aac",
+                    "-map", "0:v:0", "-map", "1:a:0",
+                    *duration_args,
+                    *audio_args,
+                    str(output_path)
+                ]
 
+            if extend_video:
                 Logger.info(f"扩展视频到目标时长: {target_duration:.2f}秒")
-            else:
-                # 标准合并，使用最短时长
-                if keep_original_audio and has_audio:
-                    # 保留原音频并混合
-                    Logger.info("保留原视频音频，与新音频混合")
-                    # 只调整新音频的音量，然后混合
-                    if audio_volume != 1.0:
-                        cmd = [
-                            ffmpeg_path, "-y", "-i", video_rel, "-i", audio_rel,
-                            "-filter_complex", f"[1:a]volume={audio_volume}[a1_vol];[0:a][a1_vol]amix=inputs=2:duration=first:dropout_transition=2[aout]",
-                            "-map", "0:v:0", "-map", "[aout]",
-                            "-c:v", "copy", "-c:a", "aac",
-                            "-shortest", output_rel
-                        ]
-                        Logger.info(f"应用新音频音量调整: {audio_volume}x")
-                    else:
-                        cmd = [
-                            ffmpeg_path, "-y", "-i", video_rel, "-i", audio_rel,
-                            "-filter_complex", f"[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2[aout]",
-                            "-map", "0:v:0", "-map", "[aout]",
-                            "-c:v", "copy", "-c:a", "aac",
-                            "-shortest", output_rel
-                        ]
-                else:
-                    # 替换原音频
-                    if has_audio:
-                        Logger.info("使用新音频替换原视频音频")
-                    else:
-                        Logger.info("原视频无音频，直接添加新音频")
-                    cmd = [
-                        ffmpeg_path, "-y", "-i", video_rel, "-i", audio_rel,
-                        "-c:v", "copy", "-c:a", "aac", "-map", "0:v:0", "-map", "1:a:0",
-                        "-shortest", output_rel
-                    ]
-                    
-                    # 如果音量不是1.0，添加音量滤镜
-                    if audio_volume != 1.0:
-                        cmd.insert(-1, "-filter:a")
-                        cmd.insert(-1, f"volume={audio_volume}")
-                        Logger.info(f"应用音频音量调整: {audio_volume}x")
 
             SystemUtils.run_cmd(cmd)
             Logger.info(f"音视频合并成功: {output_path}")
@@ -817,5 +1314,3 @@ class MediaProcessor:
         except Exception as e:
             Logger.error(f"音视频合并失败: {e}")
             raise
-        finally:
-            os.chdir(original_cwd)
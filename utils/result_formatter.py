@@ -4,10 +4,61 @@
 提供统一的结果格式化功能，用于API和UI层。
 """
 
-from typing import Dict, Any, Optional, List, Union
+import os
+from typing import Dict, Any, Iterator, Optional, List, Tuple, Union
 from utils.logger import Logger
 
 
+# 识别最终视频输出时匹配的扩展名（不含点，小写）
+_VIDEO_EXT_SET = frozenset({"mp4", "avi", "mov", "mkv", "webm"})
+
+# 任务输出中优先读取的文件字段（按优先级排列）
+_PREF_KEYS = ("output", "output_path", "audio_path", "video_path", "image_path", "output_file")
+
+
+# 任务执行详情 HTML 模板（只在模块加载时构建一次）
+_HTML_HEADER_TMPL = """
+        <div style="border: 1px solid #ddd; padding: 15px; border-radius: 5px; background-color: #f9f9f9;">
+            <h4 style="margin-top: 0; color: #333;">📋 任务执行详情</h4>
+            <p style="margin-bottom: 15px;">
+                <strong>总任务数:</strong> {total_tasks} |
+                <strong style="color: #4CAF50;">✅ 成功:</strong> {success_count} |
+                <strong style="color: #f44336;">❌ 失败:</strong> {failed_count} |
+                <strong style="color: #FF9800;">⏭️ 跳过:</strong> {skipped_count} |
+                <strong>成功率:</strong> {success_rate:.1f}%
+            </p>
+            <table style="width: 100%; border-collapse: collapse; font-size: 14px;">
+                <thead>
+                    <tr style="background-color: #4CAF50; color: white;">
+                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">序号</th>
+                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">任务名称</th>
+                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">任务类型</th>
+                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">状态</th>
+                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">输出文件</th>
+                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">备注</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """
+
+_HTML_ROW_TMPL = """
+                <tr style="background-color: {bg_color};">
+                    <td style="padding: 8px; border: 1px solid #ddd;">{idx}</td>
+                    <td style="padding: 8px; border: 1px solid #ddd;">{task_name}</td>
+                    <td style="padding: 8px; border: 1px solid #ddd;">{task_type}</td>
+                    <td style="padding: 8px; border: 1px solid #ddd; color: {status_color}; font-weight: bold;">{status}</td>
+                    <td style="padding: 8px; border: 1px solid #ddd; font-size: 12px;">{output_files}</td>
+                    <td style="padding: 8px; border: 1px solid #ddd; font-size: 12px;">{remark}</td>
+                </tr>
+            """
+
+_HTML_FOOTER = """
+                </tbody>
+            </table>
+        </div>
+        """
+
+
 class ResultFormatter:
     """结果格式化工具类"""
 
@@ -57,21 +108,45 @@ class ResultFormatter:
             Logger.warning(f"最后一个任务 {last_task_id} 没有输出，final_video 为空")
             return None
 
-        # 从最后一个任务的输出中提取视频文件
-        for key, value in last_task_output.items():
-            if isinstance(value, str) and value.endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm')):
+        # 从最后一个任务的输出中提取视频文件（一次扫描已包含 output 字段）
+        for value in last_task_output.values():
+            if isinstance(value, str) and os.path.splitext(value)[1][1:].lower() in _VIDEO_EXT_SET:
                 Logger.info(f"找到最终视频: {value}")
                 return value
 
-        # 如果最后一个任务的输出字段中没有视频文件，检查 output 字段
-        output_value = last_task_output.get("output", "")
-        if output_value and isinstance(output_value, str) and output_value.endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm')):
-            Logger.info(f"从 output 字段找到最终视频: {output_value}")
-            return output_value
-
         Logger.warning(f"最后一个任务 {last_task_id} 的输出中没有找到视频文件，final_video 为空")
         return None
 
+    @staticmethod
+    def _iter_output_files(task_output: Dict[str, Any]) -> Iterator[str]:
+        """
+        按顺序逐个产出任务输出中的文件路径
+
+        Args:
+            task_output: 任务输出
+
+        Yields:
+            文件路径
+        """
+        found = False
+
+        # 检查常见的输出字段（按优先级直接查找，不遍历整个字典）
+        for key in _PREF_KEYS:
+            value = task_output.get(key)
+            if isinstance(value, str):
+                found = True
+                yield value
+            elif isinstance(value, list):
+                for path in map(str, filter(None, value)):
+                    found = True
+                    yield path
+
+        # 如果没有找到，检查整个字典
+        if not found:
+            for key, value in task_output.items():
+                if isinstance(value, str) and ("output" in key.lower() or "path" in key.lower()):
+                    yield value
+
     @staticmethod
     def extract_output_files_from_task(task_output: Dict[str, Any], format_for_display: bool = False) -> Union[List[str], str]:
         """
@@ -85,35 +160,46 @@ class ResultFormatter:
             如果 format_for_display=False，返回文件路径列表
             如果 format_for_display=True，返回格式化的HTML字符串（用于前端展示）
         """
+        if not format_for_display:
+            # 返回列表格式
+            return list(ResultFormatter._iter_output_files(task_output))
+
+        # 格式化为前端展示所需的字符串格式：只保留前3个文件，其余只计数
         files = []
-        
-        # 检查常见的输出字段
-        for key in ["output", "output_path", "audio_path", "video_path", "image_path", "output_file"]:
-            if key in task_output:
-                value = task_output[key]
-                if isinstance(value, str):
-                    files.append(value)
-                elif isinstance(value, list):
-                    files.extend([str(v) for v in value if v])
-        
-        # 如果没有找到，检查整个字典
-        if not files:
-            for key, value in task_output.items():
-                if isinstance(value, str) and ("output" in key.lower() or "path" in key.lower()):
-                    files.append(value)
-        
-        # 根据参数决定返回格式
-        if format_for_display:
-            # 格式化为前端展示所需的字符串格式
-            if len(files) > 3:
-                return f"{files[0]} ... (+{len(files)-1} more)"
-            elif files:
-                return "<br>".join(files[:3])
-            else:
-                return "-"
+        total = 0
+        for path in ResultFormatter._iter_output_files(task_output):
+            total += 1
+            if total <= 3:
+                files.append(path)
+
+        if total > 3:
+            return f"{files[0]} ... (+{total-1} more)"
+        elif files:
+            return "<br>".join(files)
         else:
-            # 返回列表格式
-            return files
+            return "-"
+
+    @staticmethod
+    def _iter_task_rows(result: Dict[str, Any], template_name: str) -> Iterator[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+        """
+        按模板定义顺序产出任务及其执行输出
+
+        Args:
+            result: 模板执行结果
+            template_name: 模板名称
+
+        Yields:
+            (序号, 任务定义, 任务输出)，模板不存在时不产出任何内容
+        """
+        from modules.template_manager import template_manager
+
+        template = template_manager.get_template(template_name)
+        if not template:
+            return
+
+        task_outputs = result.get("task_outputs", {})
+        for idx, task in enumerate(template.get("tasks", []), 1):
+            yield idx, task, task_outputs.get(task["id"], {})
 
     @staticmethod
     def build_task_results(result: Dict[str, Any], template_name: str) -> List[Dict[str, Any]]:
@@ -127,23 +213,14 @@ class ResultFormatter:
         Returns:
             任务结果列表
         """
-        from modules.template_manager import template_manager
-        
         task_results = []
         
         if not result.get("success"):
             return task_results
         
-        template = template_manager.get_template(template_name)
-        if not template:
-            return task_results
-        
-        tasks = template.get("tasks", [])
-        task_outputs = result.get("task_outputs", {})
-        
-        for idx, task in enumerate(tasks, 1):
+        for idx, task, task_output in ResultFormatter._iter_task_rows(result, template_name):
             task_id = task["id"]
-            task_output = task_outputs.get(task_id, {})
+            output_files = ResultFormatter.extract_output_files_from_task(task_output)
             
             # 判断任务状态
             # 1. 优先检查 success 字段（如果明确标记为失败）
@@ -160,8 +237,6 @@ class ResultFormatter:
                 error_msg = None
             # 4. 如果有输出，检查是否有实际的输出内容
             else:
-                # 提取输出文件
-                output_files = ResultFormatter.extract_output_files_from_task(task_output)
                 if output_files:
                     status = "success"
                     error_msg = None
@@ -180,8 +255,6 @@ class ResultFormatter:
                 "error": error_msg
             }
             
-            # 提取输出文件
-            output_files = ResultFormatter.extract_output_files_from_task(task_output)
             task_result["output_files"] = output_files[:3]  # 最多显示3个文件
             
             task_results.append(task_result)
@@ -226,12 +299,8 @@ class ResultFormatter:
             "error": result.get("error") if not result.get("success") else None
         }
         
-        # 保留原始结果中的其他字段
-        for key, value in result.items():
-            if key not in formatted_result:
-                formatted_result[key] = value
-        
-        return formatted_result
+        # 保留原始结果中的其他字段，同名字段以格式化结果为准
+        return {**result, **formatted_result}
 
     @staticmethod
     def generate_task_results_html(result: Dict[str, Any]) -> str:
@@ -244,30 +313,22 @@ class ResultFormatter:
         Returns:
             HTML字符串
         """
-        from modules.template_manager import template_manager
-        
         if not result.get("success"):
             error_msg = result.get("error", "未知错误")
             return f"<div style='color: red;'>处理失败: {error_msg}</div>"
         
-        task_outputs = result.get("task_outputs", {})
         total_tasks = result.get("total_tasks", 0)
         completed_tasks = result.get("completed_tasks", 0)
 
-        # 重新构建任务结果列表以获取准确的状态统计
-        from modules.template_manager import template_manager
-        template = template_manager.get_template(result.get("template_name", ""))
-        tasks = template.get("tasks", []) if template else []
+        # 模板只查询一次，统计与表格渲染共用同一份任务列表
+        rows = list(ResultFormatter._iter_task_rows(result, result.get("template_name", "")))
 
         # 统计成功和失败的任务数量
         success_count = 0
         failed_count = 0
         skipped_count = 0
 
-        for task in tasks:
-            task_id = task["id"]
-            task_output = task_outputs.get(task_id, {})
-
+        for _, _, task_output in rows:
             # 判断任务状态
             if task_output.get("success") is False or "error" in task_output:
                 failed_count += 1
@@ -284,91 +345,63 @@ class ResultFormatter:
         # 计算成功率，避免除零错误
         success_rate = (success_count / total_tasks * 100) if total_tasks > 0 else 0.0
         
-        html = f"""
-        <div style="border: 1px solid #ddd; padding: 15px; border-radius: 5px; background-color: #f9f9f9;">
-            <h4 style="margin-top: 0; color: #333;">📋 任务执行详情</h4>
-            <p style="margin-bottom: 15px;">
-                <strong>总任务数:</strong> {total_tasks} |
-                <strong style="color: #4CAF50;">✅ 成功:</strong> {success_count} |
-                <strong style="color: #f44336;">❌ 失败:</strong> {failed_count} |
-                <strong style="color: #FF9800;">⏭️ 跳过:</strong> {skipped_count} |
-                <strong>成功率:</strong> {success_rate:.1f}%
-            </p>
-            <table style="width: 100%; border-collapse: collapse; font-size: 14px;">
-                <thead>
-                    <tr style="background-color: #4CAF50; color: white;">
-                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">序号</th>
-                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">任务名称</th>
-                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">任务类型</th>
-                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">状态</th>
-                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">输出文件</th>
-                        <th style="padding: 10px; text-align: left; border: 1px solid #ddd;">备注</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
+        parts = [_HTML_HEADER_TMPL.format(
+            total_tasks=total_tasks,
+            success_count=success_count,
+            failed_count=failed_count,
+            skipped_count=skipped_count,
+            success_rate=success_rate
+        )]
         
-        # 获取模板任务列表（按执行顺序）
-        template = template_manager.get_template(result.get("template_name", ""))
-        
-        if template:
-            tasks = template.get("tasks", [])
-            for idx, task in enumerate(tasks, 1):
-                task_id = task["id"]
-                task_name = task["name"]
-                task_type = task["type"]
-                
-                # 获取任务执行结果
-                task_output = task_outputs.get(task_id, {})
-                
-                # 判断任务状态（优先检查 success 字段）
-                if task_output.get("success") is False:
-                    status = "❌ 失败"
-                    status_color = "#f44336"
-                    error_msg = task_output.get("error", "任务执行失败")
-                    output_files = "-"
-                    remark = f"错误: {error_msg}"
-                elif "error" in task_output:
-                    status = "❌ 失败"
-                    status_color = "#f44336"
-                    error_msg = task_output.get("error", "未知错误")
-                    output_files = "-"
-                    remark = f"错误: {error_msg}"
-                elif not task_output:
+        # 按模板定义顺序渲染任务
+        for idx, task, task_output in rows:
+            task_name = task["name"]
+            task_type = task["type"]
+            
+            # 判断任务状态（优先检查 success 字段）
+            if task_output.get("success") is False:
+                status = "❌ 失败"
+                status_color = "#f44336"
+                error_msg = task_output.get("error", "任务执行失败")
+                output_files = "-"
+                remark = f"错误: {error_msg}"
+            elif "error" in task_output:
+                status = "❌ 失败"
+                status_color = "#f44336"
+                error_msg = task_output.get("error", "未知错误")
+                output_files = "-"
+                remark = f"错误: {error_msg}"
+            elif not task_output:
+                status = "⏭️ 跳过"
+                status_color = "#FF9800"
+                output_files = "-"
+                remark = "未执行"
+            else:
+                # 提取输出文件（格式化为前端展示格式）
+                output_files = ResultFormatter.extract_output_files_from_task(task_output, format_for_display=True)
+                if output_files and output_files != "-":
+                    status = "✅ 成功"
+                    status_color = "#4CAF50"
+                    remark = "执行成功"
+                else:
                     status = "⏭️ 跳过"
                     status_color = "#FF9800"
-                    output_files = "-"
-                    remark = "未执行"
-                else:
-                    # 提取输出文件（格式化为前端展示格式）
-                    output_files = ResultFormatter.extract_output_files_from_task(task_output, format_for_display=True)
-                    if output_files and output_files != "-":
-                        status = "✅ 成功"
-                        status_color = "#4CAF50"
-                        remark = "执行成功"
-                    else:
-                        status = "⏭️ 跳过"
-                        status_color = "#FF9800"
-                        remark = "无输出"
-                
-                html += f"""
-                    <tr style="background-color: {'#f5f5f5' if idx % 2 == 0 else 'white'};">
-                        <td style="padding: 8px; border: 1px solid #ddd;">{idx}</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">{task_name}</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">{task_type}</td>
-                        <td style="padding: 8px; border: 1px solid #ddd; color: {status_color}; font-weight: bold;">{status}</td>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-size: 12px;">{output_files}</td>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-size: 12px;">{remark}</td>
-                    </tr>
-                """
+                    remark = "无输出"
+            
+            parts.append(_HTML_ROW_TMPL.format(
+                bg_color='#f5f5f5' if idx % 2 == 0 else 'white',
+                idx=idx,
+                task_name=task_name,
+                task_type=task_type,
+                status_color=status_color,
+                status=status,
+                output_files=output_files,
+                remark=remark
+            ))
         
-        html += """
-                </tbody>
-            </table>
-        </div>
-        """
+        parts.append(_HTML_FOOTER)
         
-        return html
+        return "".join(parts)
 
 
 # 创建全局实例
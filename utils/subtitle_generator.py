@@ -5,15 +5,41 @@
 """
 
 import re
+import math
 from datetime import timedelta
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
-from typing import List
+from types import MappingProxyType
+from typing import Any, List, Mapping
 
+from utils.file_utils import FileUtils
 from utils.logger import Logger
 
 
+# 按全角宽度换行的字符：中文汉字及中文标点
+_CJK_PUNCTUATION = '，。！？；：""（）【】《》'
+# 将一行文本切分为单个中文字符，或连续的非中文字符片段
+_WRAP_TOKEN_RE = re.compile(
+    f"(?P<cjk>[\u4e00-\u9fff{_CJK_PUNCTUATION}])|(?P<other>[^\u4e00-\u9fff{_CJK_PUNCTUATION}]+)"
+)
+# SRT 字幕块分隔（空行）与时间轴行
+_SRT_BLOCK_SPLIT = re.compile(r'\n\s*\n')
+_SRT_TIME_RE = re.compile(r'(\d{1,2}):(\d{2}):(\d{2}),(\d{3}) --> (\d{1,2}):(\d{2}):(\d{2}),(\d{3})')
+# 对话文本中尖括号的转义表
+_HTML_TRANS = str.maketrans({'<': '&lt;', '>': '&gt;'})
+# 分段用的标点：匹配到给定范围内最右侧的标点（贪婪 .* 在 C 层完成反向查找）
+_SENTENCE_END_RE = re.compile(r'.*[。！？.!?]', re.S)
+_CLAUSE_END_RE = re.compile(r'.*[，；,;]', re.S)
+_ENUM_COMMA_RE = re.compile(r'.*[、]', re.S)
+_ANY_PUNCT = frozenset('。！？，；、.!?;,')
+_CN_PUNCT = frozenset('。！？，；、')
+
+
 class SubtitleSegment:
     """字幕段数据类"""
+    __slots__ = ('start', 'end', 'text')
+
     def __init__(self, start: float, end: float, text: str):
         self.start = start
         self.end = end
@@ -54,7 +80,7 @@ class SubtitleGenerator:
 
             # 文本长度等于或超过 max_chars_per_line，检查是否需要分割
             # 检查是否包含标点符号（支持中英文标点）
-            has_punctuation = any(c in text for c in '。！？，；、.!?;,')
+            has_punctuation = not _ANY_PUNCT.isdisjoint(text)
 
             if not has_punctuation:
                 # 没有标点符号，且长度不超过 max_chars_per_line * max_lines_per_segment，直接使用
@@ -72,23 +98,17 @@ class SubtitleGenerator:
 
             # 为每个部分分配时间戳
             if len(parts) > 1:
-                total_chars = sum(len(p) for p in parts)
-                current_start = seg.start
-
-                for part in parts:
-                    # 根据字符数比例分配时间
-                    part_duration = duration * (len(part) / total_chars)
-                    part_end = current_start + part_duration
-
-                    # 创建新的字幕段
-                    new_seg = SubtitleSegment(
-                        start=current_start,
-                        end=part_end,
-                        text=part
-                    )
-                    result_segments.append(new_seg)
-
-                    current_start = part_end
+                # 根据字符数比例分配时间：对字符数做前缀和，一次算出所有分段边界
+                char_offsets = list(accumulate(map(len, parts)))
+                total_chars = char_offsets[-1]
+                bounds = [seg.start]
+                bounds.extend(seg.start + duration * (offset / total_chars) for offset in char_offsets)
+
+                # 创建新的字幕段
+                result_segments.extend(
+                    SubtitleSegment(start=start, end=end, text=part)
+                    for part, start, end in zip(parts, bounds, bounds[1:])
+                )
             else:
                 result_segments.append(seg)
 
@@ -113,60 +133,67 @@ class SubtitleGenerator:
 
         # 如果文本长度等于 max_chars，检查是否包含标点符号
         if len(text) == max_chars:
-            has_punctuation = any(c in text for c in '。！？，；、')
+            has_punctuation = not _CN_PUNCT.isdisjoint(text)
             if not has_punctuation:
                 return [text]
             # 如果有标点符号，继续进行分割
 
-        # 递归分割函数
-        def split_recursive(text: str, max_chars: int) -> List[str]:
-            if len(text) <= max_chars:
-                return [text]
+        # 用显式栈代替递归：先压入后半段、再压入前半段，保证按原文顺序输出
+        result = []
+        stack = [text]
+        while stack:
+            chunk = stack.pop()
+            if len(chunk) <= max_chars:
+                result.append(chunk)
+                continue
 
-            # 寻找最佳分割点
-            best_split_pos = -1
+            split_pos = SubtitleGenerator._find_split_pos(chunk, max_chars)
+            stack.append(chunk[split_pos:].strip())
+            stack.append(chunk[:split_pos].strip())
 
-            # 优先级1: 在 max_chars 范围内寻找句号
-            for i in range(min(max_chars, len(text)), 0, -1):
-                if text[i-1] in '。！？.!?':
-                    best_split_pos = i
-                    break
+        return result
 
-            # 优先级2: 如果没有找到句号，寻找逗号
-            if best_split_pos == -1:
-                for i in range(min(max_chars, len(text)), 0, -1):
-                    if text[i-1] in '，；,;':
-                        best_split_pos = i
-                        break
+    @staticmethod
+    def _find_split_pos(text: str, max_chars: int) -> int:
+        """
+        在前 max_chars 个字符内寻找最佳分割点
 
-            # 优先级3: 如果没有找到逗号，寻找顿号
-            if best_split_pos == -1:
-                for i in range(min(max_chars, len(text)), 0, -1):
-                    if text[i-1] in '、':
-                        best_split_pos = i
-                        break
+        Args:
+            text: 要分割的文本
+            max_chars: 每段最大字符数
 
-            # 优先级4: 如果没有找到任何标点，在 max_chars 处强制分割
-            if best_split_pos == -1:
-                best_split_pos = min(max_chars, len(text))
+        Returns:
+            int: 分割位置（分割点前一个字符为标点，或强制在 max_chars 处分割）
+        """
+        # 依次寻找最右侧的 优先级1: 句号；优先级2: 逗号；优先级3: 顿号
+        limit = min(max_chars, len(text))
+        for pattern in (_SENTENCE_END_RE, _CLAUSE_END_RE, _ENUM_COMMA_RE):
+            match = pattern.match(text, 0, limit)
+            if match:
+                return match.end()
 
-            # 分割文本
-            first_part = text[:best_split_pos].strip()
-            second_part = text[best_split_pos:].strip()
+        # 优先级4: 如果没有找到任何标点，在 max_chars 处强制分割
+        return limit
 
-            # 递归处理两部分
-            result = []
-            result.extend(split_recursive(first_part, max_chars))
-            result.extend(split_recursive(second_part, max_chars))
+    @staticmethod
+    def format_timestamp(seconds: float) -> str:
+        """
+        格式化时间戳为SRT格式
 
-            return result
+        Args:
+            seconds: 时间（秒）
 
-        return split_recursive(text, max_chars)
+        Returns:
+            str: 格式化的时间戳，如 "00:00:01,000"
+        """
+        # 按时间值缓存格式化结果，相邻字幕的结束/开始时间常常相同
+        return SubtitleGenerator._format_seconds(seconds)
 
     @staticmethod
-    def format_timestamp(seconds: float) -> str:
+    @lru_cache(maxsize=4096)
+    def _format_seconds(seconds: float) -> str:
         """
-        格式化时间戳为SRT格式
+        将秒数格式化为SRT时间戳（毫秒部分截断，不四舍五入）
 
         Args:
             seconds: 时间（秒）
@@ -174,12 +201,12 @@ class SubtitleGenerator:
         Returns:
             str: 格式化的时间戳，如 "00:00:01,000"
         """
-        td = timedelta(seconds=seconds)
-        total_seconds = int(td.total_seconds())
+        total = timedelta(seconds=seconds).total_seconds()
+        total_seconds = int(total)
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
         secs = total_seconds % 60
-        milliseconds = int((td.total_seconds() - int(td.total_seconds())) * 1000)
+        milliseconds = int((total - total_seconds) * 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
 
     @staticmethod
@@ -202,8 +229,8 @@ class SubtitleGenerator:
             max_chars_per_line: 每行最大字符数（默认20）
             max_lines_per_segment: 每段最大行数（默认2）
         """
-        output_path = Path(output_path).resolve()
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path = Path(output_path)
+        FileUtils.ensure_dir(output_path.parent)
 
         # 智能分割过长的字幕段
         segments = SubtitleGenerator.split_long_segments(
@@ -212,19 +239,24 @@ class SubtitleGenerator:
             max_lines_per_segment=max_lines_per_segment
         )
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            for i, seg in enumerate(segments, start=1):
-                start = SubtitleGenerator.format_timestamp(seg.start)
-                end = SubtitleGenerator.format_timestamp(seg.end)
-                orig = seg.text.strip()
-
-                if bilingual and translated_segments:
-                    trans = translated_segments[i-1].text.strip() if i-1 < len(translated_segments) else ""
-                    text_block = (orig + "\n" + trans).strip()
-                else:
-                    text_block = orig
+        # 按列批量生成时间戳和文本，再一次性拼接并写入文件
+        fmt = SubtitleGenerator.format_timestamp
+        starts = [fmt(seg.start) for seg in segments]
+        ends = [fmt(seg.end) for seg in segments]
+        texts = [seg.text.strip() for seg in segments]
+        if bilingual and translated_segments:
+            # 译文不足时以空字符串补齐
+            trans_texts = [t.text.strip() for t in translated_segments[:len(segments)]]
+            trans_texts.extend([""] * (len(segments) - len(trans_texts)))
+            texts = [(orig + "\n" + trans).strip() for orig, trans in zip(texts, trans_texts)]
+
+        parts = [
+            f"{i}\n{start} --> {end}\n{text}\n\n"
+            for i, (start, end, text) in enumerate(zip(starts, ends, texts), start=1)
+        ]
 
-                f.write(f"{i}\n{start} --> {end}\n{text_block}\n\n")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("".join(parts))
 
     @staticmethod
     def wrap_chinese_text(text: str, video_width: int, font_size: int) -> str:
@@ -250,20 +282,29 @@ class SubtitleGenerator:
             if len(line) <= char_per_line:
                 wrapped_lines.append(line)
             else:
+                # 中文字符逐个计数，每行最多 char_per_line 个；
+                # 连续的非中文字符整段处理，每行最多 char_per_line * 1.5 个
+                other_limit = max(1, math.ceil(char_per_line * 1.5))
                 current_line = ""
-                for char in line:
-                    if '\u4e00' <= char <= '\u9fff' or char in '，。！？；：""''（）【】《》':
+                for match in _WRAP_TOKEN_RE.finditer(line):
+                    char = match.group("cjk")
+                    if char is not None:
                         if len(current_line) >= char_per_line:
                             wrapped_lines.append(current_line)
                             current_line = char
                         else:
                             current_line += char
-                    else:
-                        if len(current_line) >= char_per_line * 1.5:
+                        continue
+
+                    run = match.group("other")
+                    pos = 0
+                    while pos < len(run):
+                        if len(current_line) >= other_limit:
                             wrapped_lines.append(current_line)
-                            current_line = char
-                        else:
-                            current_line += char
+                            current_line = ""
+                        take = other_limit - len(current_line)
+                        current_line += run[pos:pos + take]
+                        pos += take
 
                 if current_line:
                     wrapped_lines.append(current_line)
@@ -271,9 +312,10 @@ class SubtitleGenerator:
         return r'\N'.join(wrapped_lines)
 
     @staticmethod
-    def get_subtitle_style_config(video_width: int) -> dict:
+    @lru_cache(maxsize=16)
+    def get_subtitle_style_config(video_width: int) -> Mapping[str, Any]:
         """
-        根据视频宽度获取字幕样式配置
+        根据视频宽度获取字幕样式配置（按宽度缓存，返回只读映射）
 
         根据最佳实践设置字体大小：
         - 640x480 (SD): 字体大小 18，适合低分辨率视频
@@ -285,7 +327,7 @@ class SubtitleGenerator:
             video_width: 视频宽度
 
         Returns:
-            dict: 字幕样式配置字典
+            Mapping[str, Any]: 字幕样式配置（只读，需要修改时请复制为 dict）
         """
         if video_width <= 640:
             # SD 分辨率 (640x480)
@@ -318,7 +360,7 @@ class SubtitleGenerator:
             margin = 20
             outline = 4
 
-        return {
+        return MappingProxyType({
             'font_size': font_size,
             'margin': margin,
             'font_name': 'Arial',
@@ -333,7 +375,53 @@ class SubtitleGenerator:
             'shadow': 2,  # 增加阴影效果
             'alignment': 2,
             'encoding': 1
-        }
+        })
+
+    @staticmethod
+    def _iter_ass_dialogues(srt_content: str, video_width: int, font_size: int):
+        """
+        逐个解析 SRT 字幕块并生成 ASS Dialogue 行
+
+        按空行分隔符逐块切片，不会一次性生成全部字幕块的列表。
+
+        Args:
+            srt_content: SRT 文件内容
+            video_width: 视频宽度
+            font_size: 字体大小
+
+        Yields:
+            str: ASS Dialogue 行
+        """
+        srt_content = srt_content.strip()
+        block_start = 0
+        separators = _SRT_BLOCK_SPLIT.finditer(srt_content)
+        while block_start is not None:
+            separator = next(separators, None)
+            if separator is None:
+                block = srt_content[block_start:]
+                block_start = None
+            else:
+                block = srt_content[block_start:separator.start()]
+                block_start = separator.end()
+
+            lines = block.strip().split('\n')
+            if len(lines) < 3:
+                continue
+            time_match = _SRT_TIME_RE.match(lines[1])
+            if not time_match:
+                continue
+
+            h1, m1, s1, ms1, h2, m2, s2, ms2 = time_match.groups()
+            # 修复时间戳格式：使用正确的ASS格式 H:MM:SS.CS (百分之一秒)
+            start_time = f"{int(h1)}:{m1}:{s1}.{int(ms1)//10:02d}"
+            end_time = f"{int(h2)}:{m2}:{s2}.{int(ms2)//10:02d}"
+
+            text = r'\N'.join(lines[2:])
+            text = text.translate(_HTML_TRANS)
+
+            text = SubtitleGenerator.wrap_chinese_text(text, video_width, font_size)
+
+            yield f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text}"
 
     @staticmethod
     def create_ass_subtitle(srt_path: Path, output_dir: Path, video_width: int, platform_suffix: str = "", subtitle_bottom_margin: int = 50) -> Path:
@@ -369,34 +457,16 @@ Style: Default,{style_config['font_name']},{style_config['font_size']},{style_co
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"""
 
-        ass_content = []
-        ass_content.append(header_content)
-
         with open(srt_path, 'r', encoding='utf-8') as f:
             srt_content = f.read()
 
-        srt_blocks = re.split(r'\n\s*\n', srt_content.strip())
-
-        for block in srt_blocks:
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                time_match = re.match(r'(\d{1,2}):(\d{2}):(\d{2}),(\d{3}) --> (\d{1,2}):(\d{2}):(\d{2}),(\d{3})', lines[1])
-                if time_match:
-                    h1, m1, s1, ms1, h2, m2, s2, ms2 = time_match.groups()
-                    # 修复时间戳格式：使用正确的ASS格式 H:MM:SS.CS (百分之一秒)
-                    start_time = f"{int(h1)}:{m1}:{s1}.{int(ms1)//10:02d}"
-                    end_time = f"{int(h2)}:{m2}:{s2}.{int(ms2)//10:02d}"
-
-                    text = r'\N'.join(lines[2:])
-                    text = text.replace('<', '&lt;').replace('>', '&gt;')
-
-                    text = SubtitleGenerator.wrap_chinese_text(text, video_width, style_config['font_size'])
-
-                    ass_content.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text}")
-
+        # 边生成边写入缓冲文件，不再在内存中拼接完整的 ASS 内容
         temp_ass_path = output_dir / f"{srt_path.stem}_temp{platform_suffix}.ass"
-        with open(temp_ass_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(ass_content))
+        with open(temp_ass_path, 'w', encoding='utf-8', newline='', buffering=1 << 16) as f:
+            f.write(header_content)
+            for dialogue in SubtitleGenerator._iter_ass_dialogues(srt_content, video_width, style_config['font_size']):
+                f.write('\n')
+                f.write(dialogue)
 
         Logger.info(f"ASS字幕文件已创建: {temp_ass_path}")
         return temp_ass_path
\ No newline at end of file
@@ -6,17 +6,34 @@
 
 import subprocess
 import logging
-from typing import List
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 from config import config
 
 logger = logging.getLogger(__name__)
 
+# 软件 H.264 编码参数（兜底方案）
+SOFTWARE_ENCODER_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "23"]
+
+# 硬件 H.264 编码参数，按优先级排列（质量大致对齐 libx264 crf 23）
+HW_ENCODER_ARGS = {
+    "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23"],
+    "h264_qsv": ["-c:v", "h264_qsv", "-preset", "faster", "-global_quality", "23"],
+    "h264_vaapi": ["-c:v", "h264_vaapi", "-qp", "23"],
+    "h264_videotoolbox": ["-c:v", "h264_videotoolbox", "-q:v", "65"],
+}
+
 
 class SystemUtils:
     """系统工具类"""
 
     _ffmpeg_path = None
+    _ffmpeg_checked = False
+    _ffprobe_path = None
+    _hw_encoder = None
+    _hw_encoder_checked = False
 
     @classmethod
     def run_cmd(cls, cmd: List[str], capture_output: bool = False, text: bool = True, encoding: str = None) -> str or dict:
@@ -48,8 +65,7 @@ class SystemUtils:
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=text,
-            encoding=encoding,
-            shell=os.name == 'nt'
+            encoding=encoding
         )
         if proc.returncode != 0:
             raise RuntimeError(
@@ -70,13 +86,14 @@ class SystemUtils:
     @classmethod
     def check_ffmpeg_available(cls) -> bool:
         """
-        检查ffmpeg是否可用
+        检查ffmpeg是否可用（结果在进程内缓存，找不到时也不再重复探测）
 
         Returns:
             bool: FFmpeg是否可用
         """
-        if cls._ffmpeg_path:
-            return True
+        if cls._ffmpeg_checked:
+            return cls._ffmpeg_path is not None
+        cls._ffmpeg_checked = True
 
         for ffmpeg_path in config.FFMPEG_PATHS:
             try:
@@ -101,12 +118,130 @@ class SystemUtils:
         Raises:
             RuntimeError: FFmpeg不可用时抛出
         """
+        # 已找到时直接返回缓存的路径，跳过可用性检查
+        if cls._ffmpeg_path:
+            return cls._ffmpeg_path
+
         if not cls.check_ffmpeg_available():
             raise RuntimeError(
                 "FFmpeg 未安装或不在 PATH 中。请安装 FFmpeg: https://ffmpeg.org/download.html"
             )
         return cls._ffmpeg_path
 
+    @classmethod
+    def get_ffprobe_path(cls) -> str:
+        """
+        获取ffprobe路径（与ffmpeg位于同一目录）
+
+        Returns:
+            str: FFprobe可执行文件路径
+
+        Raises:
+            RuntimeError: FFmpeg不可用时抛出
+        """
+        if cls._ffprobe_path:
+            return cls._ffprobe_path
+
+        ffmpeg_path = Path(cls.get_ffmpeg_path())
+        ffprobe_name = ffmpeg_path.name.replace("ffmpeg", "ffprobe")
+        if ffmpeg_path.parent == Path("."):
+            cls._ffprobe_path = ffprobe_name
+        else:
+            cls._ffprobe_path = str(ffmpeg_path.with_name(ffprobe_name))
+        return cls._ffprobe_path
+
+    @classmethod
+    def _hw_encoder_io_args(cls, encoder: str) -> Tuple[List[str], str]:
+        """
+        获取硬件编码器需要的输入参数和滤镜后缀
+
+        VAAPI 需要指定设备，并在软件滤镜（如字幕）之后上传帧到显存。
+
+        Args:
+            encoder: 编码器名称
+
+        Returns:
+            Tuple[List[str], str]: (输入前参数, 滤镜链后缀)
+        """
+        if encoder == "h264_vaapi":
+            return ["-vaapi_device", config.VAAPI_DEVICE], ",format=nv12,hwupload"
+        return [], ""
+
+    @classmethod
+    def detect_hw_encoder(cls) -> Optional[str]:
+        """
+        检测可用的硬件 H.264 编码器（结果在进程内缓存）
+
+        先通过 `ffmpeg -encoders` 判断编码器是否编译进 ffmpeg，
+        再用一帧测试编码确认硬件确实可用。
+
+        Returns:
+            Optional[str]: 编码器名称，没有可用硬件编码器时返回 None
+        """
+        if cls._hw_encoder_checked:
+            return cls._hw_encoder
+        cls._hw_encoder_checked = True
+
+        preference = config.VIDEO_HW_ENCODER.strip().lower()
+        if preference in ("", "none", "off", "false", "0"):
+            return None
+        if preference == "auto":
+            candidates = list(HW_ENCODER_ARGS)
+        elif preference in HW_ENCODER_ARGS:
+            candidates = [preference]
+        else:
+            logger.warning(f"Unknown VIDEO_HW_ENCODER: {config.VIDEO_HW_ENCODER}, using libx264")
+            return None
+
+        try:
+            ffmpeg_path = cls.get_ffmpeg_path()
+            encoders = subprocess.run(
+                [ffmpeg_path, "-hide_banner", "-encoders"],
+                capture_output=True, text=True, encoding='utf-8', errors='ignore'
+            ).stdout
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"Failed to list ffmpeg encoders: {e}")
+            return None
+
+        for encoder in candidates:
+            if encoder not in encoders:
+                continue
+            input_args, filter_suffix = cls._hw_encoder_io_args(encoder)
+            test_cmd = [
+                ffmpeg_path, "-hide_banner", "-v", "error", *input_args,
+                "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1",
+                "-vf", f"format=yuv420p{filter_suffix}",
+                *HW_ENCODER_ARGS[encoder], "-frames:v", "1", "-f", "null", "-"
+            ]
+            try:
+                proc = subprocess.run(test_cmd, capture_output=True, timeout=30)
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            if proc.returncode == 0:
+                cls._hw_encoder = encoder
+                logger.info(f"Using hardware video encoder: {encoder}")
+                break
+
+        if cls._hw_encoder is None:
+            logger.info("No hardware video encoder available, using libx264")
+        return cls._hw_encoder
+
+    @classmethod
+    def get_video_encode_plans(cls) -> List[Tuple[List[str], List[str], str]]:
+        """
+        获取视频编码方案列表（硬件编码优先，libx264 兜底）
+
+        Returns:
+            List[Tuple[List[str], List[str], str]]: 每项为 (输入前参数, 编码参数, 滤镜链后缀)
+        """
+        plans = []
+        encoder = cls.detect_hw_encoder()
+        if encoder:
+            input_args, filter_suffix = cls._hw_encoder_io_args(encoder)
+            plans.append((input_args, HW_ENCODER_ARGS[encoder], filter_suffix))
+        plans.append(([], SOFTWARE_ENCODER_ARGS, ""))
+        return plans
+
     @classmethod
     def get_system_info(cls) -> dict:
         """
@@ -115,6 +250,25 @@ class SystemUtils:
         Returns:
             dict: 包含系统信息的字典
         """
+        import psutil
+
+        # 可用内存随时变化，每次调用取一次快照；其余信息在进程内不变，只查询一次
+        memory = psutil.virtual_memory()
+        return {
+            **cls._static_system_info(),
+            'memory_total': memory.total,
+            'memory_available': memory.available
+        }
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _static_system_info() -> Dict[str, Any]:
+        """
+        获取进程运行期间不变的系统信息（缓存）
+
+        Returns:
+            dict: 平台、架构、处理器及 CPU 核心数
+        """
         import platform
         import psutil
 
@@ -124,9 +278,7 @@ class SystemUtils:
             'platform_version': platform.version(),
             'architecture': platform.machine(),
             'processor': platform.processor(),
-            'cpu_count': psutil.cpu_count(logical=True),
-            'memory_total': psutil.virtual_memory().total,
-            'memory_available': psutil.virtual_memory().available
+            'cpu_count': psutil.cpu_count(logical=True)
         }
 
     @classmethod
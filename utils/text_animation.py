@@ -4,6 +4,7 @@
 提供花字的动态效果系统，支持多种动画效果。
 """
 
+import cv2
 import numpy as np
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Tuple, Optional
@@ -16,6 +17,14 @@ class BaseTextAnimation(ABC):
     def __init__(self):
         self.name = self.__class__.__name__
         self.category = "TextAnimation"
+        # 逐帧复用的输出缓冲区，返回的图像在下一帧调用时会被覆盖
+        self._buffer: Optional[np.ndarray] = None
+
+    def _output_buffer(self, text_image: np.ndarray) -> np.ndarray:
+        """获取与输入图像同形状、同类型的复用输出缓冲区（形状变化时重新分配）"""
+        if self._buffer is None or self._buffer.shape != text_image.shape or self._buffer.dtype != text_image.dtype:
+            self._buffer = np.empty_like(text_image)
+        return self._buffer
 
     @abstractmethod
     def get_params(self) -> Dict[str, Any]:
@@ -91,47 +100,36 @@ class MarqueeAnimation(BaseTextAnimation):
         direction: str = "left",
         **kwargs
     ) -> np.ndarray:
-        """应用走马灯效果"""
-        try:
-            import cv2
-
-            height, width = text_image.shape[:2]
-
-            # 计算偏移量（像素）- speed 是相对值，需要乘以 100
-            actual_speed = speed * 100.0  # 实际速度（像素/秒）
-            offset = (frame_index / fps) * actual_speed
-
-            # 使用np.roll实现循环滚动（numpy内置函数，高效且可靠）
-            if direction == "left":
-                # 从右向左滚动
-                shift_x = int(offset) % width
-                result = np.roll(text_image, shift=-shift_x, axis=1)
-
-            elif direction == "right":
-                # 从左向右滚动
-                shift_x = int(offset) % width
-                result = np.roll(text_image, shift=shift_x, axis=1)
-
-            elif direction == "up":
-                # 从下向上滚动
-                shift_y = int(offset) % height
-                result = np.roll(text_image, shift=-shift_y, axis=0)
-
-            elif direction == "down":
-                # 从上向下滚动
-                shift_y = int(offset) % height
-                result = np.roll(text_image, shift=shift_y, axis=0)
-
-            else:
-                result = text_image.copy()
+        """应用走马灯效果（逐帧调用，异常由调用方统一捕获处理）"""
+        height, width = text_image.shape[:2]
+
+        # 计算偏移量（像素）- speed 是相对值，需要乘以 100
+        actual_speed = speed * 100.0  # 实际速度（像素/秒）
+        offset = (frame_index / fps) * actual_speed
+
+        # 平移 + BORDER_WRAP 实现循环滚动，直接写入复用的输出缓冲区
+        if direction == "left":
+            # 从右向左滚动
+            tx, ty = -(int(offset) % width), 0
+        elif direction == "right":
+            # 从左向右滚动
+            tx, ty = int(offset) % width, 0
+        elif direction == "up":
+            # 从下向上滚动
+            tx, ty = 0, -(int(offset) % height)
+        elif direction == "down":
+            # 从上向下滚动
+            tx, ty = 0, int(offset) % height
+        else:
+            return text_image.copy()
 
-            return result
+        matrix = np.float32([[1, 0, tx], [0, 1, ty]])
+        result = cv2.warpAffine(
+            text_image, matrix, (width, height), dst=self._output_buffer(text_image),
+            flags=cv2.INTER_NEAREST, borderMode=cv2.BORDER_WRAP
+        )
 
-        except Exception as e:
-            Logger.error(f"走马灯动效应用失败: {e}")
-            import traceback
-            Logger.error(traceback.format_exc())
-            return text_image
+        return result
 
 
 class HeartbeatAnimation(BaseTextAnimation):
@@ -173,61 +171,26 @@ class HeartbeatAnimation(BaseTextAnimation):
         speed: float = 1.0,
         **kwargs
     ) -> np.ndarray:
-        """应用心动效果"""
-        try:
-            import cv2
-
-            height, width = text_image.shape[:2]
-
-            # 计算心跳缩放比例
-            time = frame_index / fps
-            # 使用正弦函数模拟心跳节奏
-            heartbeat = (np.sin(time * speed * 2 * np.pi) + 1) / 2  # 0-1
-            scale = scale_min + (scale_max - scale_min) * heartbeat
-
-            # 计算新尺寸
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-
-            # 缩放图像
-            scaled = cv2.resize(text_image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-
-            # 创建输出图像（居中）
-            result = np.zeros_like(text_image)
-            start_x = (width - new_width) // 2
-            start_y = (height - new_height) // 2
-
-            # 计算实际可以复制的区域
-            if start_x < 0:
-                src_start_x = -start_x
-                dst_start_x = 0
-                copy_width = min(new_width - src_start_x, width)
-            else:
-                src_start_x = 0
-                dst_start_x = start_x
-                copy_width = min(new_width, width - start_x)
-
-            if start_y < 0:
-                src_start_y = -start_y
-                dst_start_y = 0
-                copy_height = min(new_height - src_start_y, height)
-            else:
-                src_start_y = 0
-                dst_start_y = start_y
-                copy_height = min(new_height, height - start_y)
-
-            # 复制缩放后的图像
-            if copy_width > 0 and copy_height > 0:
-                result[dst_start_y:dst_start_y + copy_height, dst_start_x:dst_start_x + copy_width] = \
-                    scaled[src_start_y:src_start_y + copy_height, src_start_x:src_start_x + copy_width]
-
-            return result
-
-        except Exception as e:
-            Logger.error(f"心动动效应用失败: {e}")
-            import traceback
-            Logger.error(traceback.format_exc())
-            return text_image
+        """应用心动效果（逐帧调用，异常由调用方统一捕获处理）"""
+        height, width = text_image.shape[:2]
+
+        # 计算心跳缩放比例
+        time = frame_index / fps
+        # 使用正弦函数模拟心跳节奏
+        heartbeat = (np.sin(time * speed * 2 * np.pi) + 1) / 2  # 0-1
+        scale = scale_min + (scale_max - scale_min) * heartbeat
+
+        # 以图像中心为原点缩放，直接渲染到复用的输出缓冲区（超出部分裁剪，空白处透明）
+        matrix = np.float32([
+            [scale, 0, (1 - scale) * width / 2],
+            [0, scale, (1 - scale) * height / 2]
+        ])
+        result = cv2.warpAffine(
+            text_image, matrix, (width, height), dst=self._output_buffer(text_image),
+            flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0)
+        )
+
+        return result
 
 
 class TextAnimationFactory:
@@ -10,6 +10,8 @@ __all__ = [
     "create_run_options",
     "configure_providers",
     "create_session",
+    "create_session_bundle",
+    "SessionBundle",
     "get_device_info_from_providers",
     "read_audio_mono",
     "read_audio_mono_v15",
@@ -22,8 +24,12 @@ __all__ = [
     "load_tokenizer",
     "mask_multichar_chinese_tokens",
     "init_db",
+    "close_db",
     "save_ref_features",
     "load_ref_features",
+    "save_prefill_state",
+    "load_prefill_state",
+    "prefill_state_key",
 ]
 
 from .constants import get_constants_for_version
@@ -32,11 +38,13 @@ from .runtime import (
     create_run_options,
     configure_providers,
     create_session,
+    create_session_bundle,
+    SessionBundle,
     get_device_info_from_providers,
 )
 from .audio_v15 import read_audio_mono, read_audio_mono_v15
 from .vae import encode_audio_to_patches, decode_audio
 from .inputs_v15 import build_inputs, build_inputs_with_patches, build_inputs_v15
-from .infer_loop_v15 import run_inference
+from .infer_loop_v15 import run_inference, prefill_state_key
 from .tokenize import load_tokenizer, mask_multichar_chinese_tokens
-from .store import init_db, save_ref_features, load_ref_features
\ No newline at end of file
+from .store import init_db, close_db, save_ref_features, load_ref_features, save_prefill_state, load_prefill_state
\ No newline at end of file
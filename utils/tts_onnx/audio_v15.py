@@ -4,10 +4,16 @@
 提供音频读取、重采样和验证功能。
 """
 
+from fractions import Fraction
 from typing import Tuple
 import numpy as np
 import soundfile as sf
 
+try:
+    from scipy.signal import resample_poly  # 可选依赖，用于多相滤波重采样
+except ImportError:
+    resample_poly = None
+
 from .constants import SAMPLE_RATE, get_constants_for_version
 
 
@@ -26,11 +32,40 @@ def resample_audio_linear(audio: np.ndarray, sr_in: int, sr_out: int) -> np.ndar
     if sr_in == sr_out:
         return audio
 
-    duration = audio.shape[0] / float(sr_in)
+    old_len = audio.shape[0]
+    duration = old_len / float(sr_in)
     new_len = int(round(duration * sr_out))
-    x_old = np.linspace(0.0, duration, num=audio.shape[0], endpoint=False)
-    x_new = np.linspace(0.0, duration, num=new_len, endpoint=False)
-    return np.interp(x_new, x_old, audio).astype(np.float32)
+    if new_len == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    # 直接在采样点下标上插值（原时间轴即 arange(old_len)），不再构造两条 linspace 时间轴
+    idx = np.arange(new_len, dtype=np.float64) * (old_len / new_len)
+    i0 = idx.astype(np.int64)
+    i1 = np.minimum(i0 + 1, old_len - 1)
+    frac = (idx - i0).astype(np.float32)
+    a0 = audio[i0].astype(np.float32)
+    return a0 + frac * (audio[i1].astype(np.float32) - a0)
+
+
+def resample_audio(audio: np.ndarray, sr_in: int, sr_out: int) -> np.ndarray:
+    """
+    重采样音频（安装了 scipy 时使用多相滤波，否则退回线性插值）
+
+    Args:
+        audio: 输入音频数组
+        sr_in: 输入采样率
+        sr_out: 输出采样率
+
+    Returns:
+        np.ndarray: 重采样后的音频 (float32)
+    """
+    if sr_in == sr_out:
+        return audio
+    if resample_poly is None:
+        return resample_audio_linear(audio, sr_in, sr_out)
+
+    ratio = Fraction(sr_out, sr_in).limit_denominator(1000)
+    return resample_poly(audio, ratio.numerator, ratio.denominator).astype(np.float32, copy=False)
 
 
 def read_audio_mono(path: str, target_sr: int = SAMPLE_RATE) -> Tuple[np.ndarray, int]:
@@ -44,7 +79,15 @@ def read_audio_mono(path: str, target_sr: int = SAMPLE_RATE) -> Tuple[np.ndarray
     Returns:
         Tuple[np.ndarray, int]: (音频数组, 采样率)
     """
-    audio, sr = sf.read(path, always_2d=False)
+    # 打开文件后先读取头部信息，再直接解码为 float32，避免先分配 float64 缓冲区再转换
+    with sf.SoundFile(path) as snd:
+        sr = snd.samplerate
+        channels = snd.channels
+        audio = snd.read(dtype='float32', always_2d=False)
+
+    # 单声道且采样率已符合要求时无需任何处理
+    if channels == 1 and sr == target_sr:
+        return audio, sr
 
     # 转换为单声道
     if audio.ndim == 2:
@@ -53,7 +96,7 @@ def read_audio_mono(path: str, target_sr: int = SAMPLE_RATE) -> Tuple[np.ndarray
     # 重采样到目标采样率
     if sr != target_sr:
         print(f"[INFO] 重采样: {sr}Hz -> {target_sr}Hz")
-        audio = resample_audio_linear(audio, sr, target_sr)
+        audio = resample_audio(audio, sr, target_sr)
         sr = target_sr
 
     audio = audio.astype(np.float32, copy=False)
@@ -129,6 +172,7 @@ __all__ = [
     "read_audio_mono",
     "read_audio_mono_v15",
     "read_audio_mono_v05b",
+    "resample_audio",
     "resample_audio_linear",
     "validate_audio_length",
     "get_audio_info"
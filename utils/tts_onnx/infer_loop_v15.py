@@ -4,14 +4,67 @@
 提供 VoxCPM 推理循环功能，支持 VoxCPM-0.5B 和 VoxCPM-1.5。
 """
 
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 import numpy as np
 import onnxruntime as ort
 from tqdm import tqdm
 
+from .runtime import ORT_NUMPY_TYPES, SessionBundle
+from .store import load_prefill_state, save_prefill_state
 
-def run_inference(prefill_sess: ort.InferenceSession,
-                  decode_sess: ort.InferenceSession,
+# 后台采样解码噪声的线程，与 Prefill 并行执行（两者都会释放 GIL）
+_NOISE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-noise")
+
+
+def _alloc_like(value: ort.OrtValue, device_type: str, device_id: int) -> ort.OrtValue:
+    """在目标设备上分配一个与给定 OrtValue 形状、类型相同的 OrtValue"""
+    return ort.OrtValue.ortvalue_from_shape_and_type(
+        value.shape(), ORT_NUMPY_TYPES[value.data_type()], device_type, device_id
+    )
+
+
+def _sample_noise(shape: tuple, dtype: np.dtype) -> np.ndarray:
+    """
+    批量采样标准正态噪声
+
+    Generator.standard_normal 只支持 float32/float64 直接输出，其他类型（如 float16）先按 float32 采样再转换。
+
+    Args:
+        shape: 噪声形状
+        dtype: 目标数据类型
+
+    Returns:
+        np.ndarray: C 连续的噪声数组
+    """
+    rng = np.random.default_rng()
+    dtype = np.dtype(dtype)
+    if dtype in (np.float32, np.float64):
+        return rng.standard_normal(shape, dtype=dtype)
+    return rng.standard_normal(shape, dtype=np.float32).astype(dtype)
+
+
+def prefill_state_key(*arrays: np.ndarray) -> str:
+    """
+    计算 Prefill 输入的哈希，作为 Prefill 状态缓存的键
+
+    Args:
+        *arrays: Prefill 的全部输入数组
+
+    Returns:
+        str: SHA-256 十六进制摘要
+    """
+    h = hashlib.sha256()
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.data)
+    return h.hexdigest()
+
+
+def run_inference(prefill: SessionBundle,
+                  decode: SessionBundle,
                   text_token: np.ndarray,
                   text_mask: np.ndarray,
                   audio_feat: np.ndarray,
@@ -24,13 +77,17 @@ def run_inference(prefill_sess: ort.InferenceSession,
                   device_id: int = 0,
                   inference_dtype: np.dtype = np.float32,
                   run_options: Optional[ort.RunOptions] = None,
-                  patch_size: int = 2) -> np.ndarray:
+                  prefill_run_options: Optional[ort.RunOptions] = None,
+                  prefill_cache_db: Optional[str] = None,
+                  prefill_cache_max_entries: int = 32,
+                  patch_size: int = 2,
+                  verbose: bool = True) -> np.ndarray:
     """
     运行 VoxCPM 推理循环，支持 VoxCPM-0.5B 和 VoxCPM-1.5
 
     Args:
-        prefill_sess: Prefill 阶段的 ONNX 会话
-        decode_sess: Decode 阶段的 ONNX 会话
+        prefill: Prefill 阶段的会话及输入/输出名称
+        decode: Decode 阶段的会话及输入/输出名称
         text_token: 文本 token
         text_mask: 文本 mask
         audio_feat: 音频特征
@@ -42,33 +99,75 @@ def run_inference(prefill_sess: ort.InferenceSession,
         device_type: 设备类型
         device_id: 设备 ID
         inference_dtype: 推理数据类型
-        run_options: 运行选项
+        run_options: Decode 阶段的运行选项
+        prefill_run_options: Prefill 阶段的运行选项（可在运行后收缩内存池）
+        prefill_cache_db: Prefill 状态缓存的 SQLite 路径，为 None 时不缓存。
+            缓存以完整的 Prefill 输入为键，相同文本与参考音频的重复合成可跳过 Prefill
+        prefill_cache_max_entries: Prefill 状态缓存最多保留的条数，超出时淘汰最久未使用的状态
         patch_size: Patch 大小 (VoxCPM-0.5B=2, VoxCPM-1.5=4)
+        verbose: 是否显示解码进度条
 
     Returns:
         np.ndarray: 生成的潜在表示
     """
-    prefill_in_names = [inp.name for inp in prefill_sess.get_inputs()]
-    prefill_out_names = [out.name for out in prefill_sess.get_outputs()]
-    decode_in_names = [inp.name for inp in decode_sess.get_inputs()]
-    decode_out_names = [out.name for out in decode_sess.get_outputs()]
-
-    # 创建 OrtValue 输入
-    text_token_ort = ort.OrtValue.ortvalue_from_numpy(text_token, device_type, device_id)
-    text_mask_ort = ort.OrtValue.ortvalue_from_numpy(text_mask, device_type, device_id)
-    audio_feat_ort = ort.OrtValue.ortvalue_from_numpy(audio_feat.astype(inference_dtype), device_type, device_id)
-    audio_mask_ort = ort.OrtValue.ortvalue_from_numpy(audio_mask, device_type, device_id)
-
-    # Prefill 阶段输入
-    input_feed_prefill = {
-        prefill_in_names[0]: text_token_ort,
-        prefill_in_names[1]: text_mask_ort,
-        prefill_in_names[2]: audio_feat_ort,
-        prefill_in_names[3]: audio_mask_ort,
-    }
-
-    # 运行 Prefill
-    outputs = prefill_sess.run_with_ort_values(prefill_out_names, input_feed_prefill)
+    prefill_in_names, prefill_out_names = prefill.in_names, list(prefill.out_names)
+    decode_in_names, decode_out_names = decode.in_names, decode.out_names
+
+    # build_inputs 已按 inference_dtype 分配 audio_feat，此处类型一致时不再拷贝
+    audio_feat = audio_feat.astype(inference_dtype, copy=False)
+
+    # 根据模型版本调整最大长度
+    # VoxCPM-1.5 的 token 速率更低，相同音频长度需要更多 token
+    if patch_size == 4:  # VoxCPM-1.5
+        # 由于 token 速率从 12.5Hz 降低到 6.25Hz，需要调整生成长度
+        effective_max_len = max_len
+        print(f"[INFO] VoxCPM-1.5 检测到，使用 patch_size={patch_size}")
+    else:  # VoxCPM-0.5B
+        effective_max_len = max_len
+        print(f"[INFO] VoxCPM-0.5B 检测到，使用 patch_size={patch_size}")
+
+    # 噪声形状与 prefix_feat_cond 相同，通常为 [1, patch_size, feat_dim]；在后台预先采样，与 Prefill 重叠
+    expected_noise_shape = (1, patch_size, audio_feat.shape[-1])
+    noise_future = _NOISE_EXECUTOR.submit(_sample_noise, (effective_max_len,) + expected_noise_shape, inference_dtype)
+
+    # 查询 Prefill 状态缓存
+    cached_states = None
+    if prefill_cache_db:
+        state_id = prefill_state_key(text_token, text_mask, audio_feat, audio_mask)
+        cached_states = load_prefill_state(prefill_cache_db, state_id)
+        if cached_states is not None and not all(name in cached_states for name in prefill_out_names):
+            cached_states = None
+
+    if cached_states is not None:
+        print("[INFO] 命中 Prefill 状态缓存，跳过 Prefill")
+        outputs = [
+            ort.OrtValue.ortvalue_from_numpy(cached_states[name], device_type, device_id)
+            for name in prefill_out_names
+        ]
+    else:
+        # 创建 OrtValue 输入
+        text_token_ort = ort.OrtValue.ortvalue_from_numpy(text_token, device_type, device_id)
+        text_mask_ort = ort.OrtValue.ortvalue_from_numpy(text_mask, device_type, device_id)
+        audio_feat_ort = ort.OrtValue.ortvalue_from_numpy(audio_feat, device_type, device_id)
+        audio_mask_ort = ort.OrtValue.ortvalue_from_numpy(audio_mask, device_type, device_id)
+
+        # Prefill 阶段输入
+        input_feed_prefill = {
+            prefill_in_names[0]: text_token_ort,
+            prefill_in_names[1]: text_mask_ort,
+            prefill_in_names[2]: audio_feat_ort,
+            prefill_in_names[3]: audio_mask_ort,
+        }
+
+        # 运行 Prefill
+        outputs = prefill.sess.run_with_ort_values(prefill_out_names, input_feed_prefill, prefill_run_options)
+
+        if prefill_cache_db:
+            save_prefill_state(
+                prefill_cache_db, state_id,
+                {name: value.numpy() for name, value in zip(prefill_out_names, outputs)},
+                max_entries=prefill_cache_max_entries,
+            )
 
     (
         dit_hidden_ort,
@@ -79,43 +178,92 @@ def run_inference(prefill_sess: ort.InferenceSession,
         prefix_feat_cond_ort,
     ) = outputs
 
-    pred_seq = []
     cfg_scalar = np.array(cfg_value, dtype=inference_dtype)
     cfg_scalar_ort = ort.OrtValue.ortvalue_from_numpy(cfg_scalar, device_type, device_id)
 
     # Decode 循环
     print(f"[INFO] 开始解码循环 (timesteps={timesteps}, patch_size={patch_size})...")
 
-    # 根据模型版本调整最大长度
-    # VoxCPM-1.5 的 token 速率更低，相同音频长度需要更多 token
-    if patch_size == 4:  # VoxCPM-1.5
-        # 由于 token 速率从 12.5Hz 降低到 6.25Hz，需要调整生成长度
-        effective_max_len = max_len
-        print(f"[INFO] VoxCPM-1.5 检测到，使用 patch_size={patch_size}")
-    else:  # VoxCPM-0.5B
-        effective_max_len = max_len
-        print(f"[INFO] VoxCPM-0.5B 检测到，使用 patch_size={patch_size}")
+    # 使用 IOBinding 执行 Decode：输入直接绑定上一步的输出 OrtValue，
+    # 形状固定的 dit_hidden 写入两块预分配缓冲区交替使用，stop_flag 直接输出到主机内存，
+    # 长度逐步增长的 K/V 缓存仍由 ORT 在目标设备上分配
+    binding = decode.sess.io_binding()
+    (
+        hidden_in_name,
+        base_keys_in_name,
+        base_values_in_name,
+        residual_keys_in_name,
+        residual_values_in_name,
+        prefix_in_name,
+        noise_in_name,
+        cfg_in_name,
+    ) = decode_in_names[:8]
+    binding.bind_ortvalue_input(cfg_in_name, cfg_scalar_ort)
+    pred_name, hidden_name, stop_name = decode_out_names[0], decode_out_names[1], decode_out_names[6]
+    kv_out_names = decode_out_names[2:6]
+    hidden_bufs = None
+    stop_buf = None
+
+    # 一次性预生成全部步骤的噪声 (形状随 patch_size 变化，各步相同)。
+    # CPU/CUDA 上整块噪声只上传一次，每步按偏移地址绑定对应切片，循环内没有主机到设备的拷贝；
+    # 其他设备的缓冲区地址不能按字节偏移，每步把切片拷入同一个常驻的噪声 OrtValue
+    noise_shape = tuple(prefix_feat_cond_ort.shape())
+    noise_pool = noise_future.result()
+    if noise_pool.shape[1:] != noise_shape:
+        noise_pool = _sample_noise((effective_max_len,) + noise_shape, inference_dtype)
+    noise_type = noise_pool.dtype.type
+    if device_type in ('cpu', 'cuda'):
+        noise_pool_ort = ort.OrtValue.ortvalue_from_numpy(noise_pool, device_type, device_id)
+        noise_base_ptr = noise_pool_ort.data_ptr()
+        noise_step_bytes = noise_pool[0].nbytes if effective_max_len else 0
+        noise_ort = None
+    else:
+        noise_ort = ort.OrtValue.ortvalue_from_shape_and_type(noise_shape, noise_type, device_type, device_id)
+        binding.bind_ortvalue_input(noise_in_name, noise_ort)
 
-    for step in tqdm(range(effective_max_len), desc="Decoding", unit="step"):
-        # 生成噪声 (适配不同的 patch_size)
-        noise_shape = prefix_feat_cond_ort.shape()
-        noise = np.random.randn(*noise_shape).astype(inference_dtype)
-        noise_ort = ort.OrtValue.ortvalue_from_numpy(noise, device_type, device_id)
+    # 预测特征与 prefix_feat_cond 形状相同：CPU 上直接写入按步索引的预分配数组，
+    # 其他设备上保留各步输出的 OrtValue，循环结束后再统一拷回主机，避免逐步的设备到主机同步
+    on_cpu = device_type == 'cpu'
+    pred_slab = np.empty((effective_max_len,) + noise_shape, dtype=ORT_NUMPY_TYPES[prefix_feat_cond_ort.data_type()]) if on_cpu else None
+    pred_seq = []
+    num_steps = 0
+
+    # 进度条按时间间隔刷新，避免每步都进入 tqdm 的更新逻辑
+    steps = range(effective_max_len)
+    if verbose:
+        steps = tqdm(steps, desc="Decoding", unit="step", mininterval=0.5, miniters=32)
+
+    for step in steps:
+        if noise_ort is None:
+            binding.bind_input(noise_in_name, device_type, device_id, noise_type, noise_shape,
+                               noise_base_ptr + step * noise_step_bytes)
+        else:
+            noise_ort.update_inplace(noise_pool[step])
 
         # Decode 阶段输入
-        input_feed_decode = {
-            decode_in_names[0]: dit_hidden_ort,
-            decode_in_names[1]: base_next_keys_ort,
-            decode_in_names[2]: base_next_values_ort,
-            decode_in_names[3]: residual_next_keys_ort,
-            decode_in_names[4]: residual_next_values_ort,
-            decode_in_names[5]: prefix_feat_cond_ort,
-            decode_in_names[6]: noise_ort,
-            decode_in_names[7]: cfg_scalar_ort,
-        }
+        binding.bind_ortvalue_input(hidden_in_name, dit_hidden_ort)
+        binding.bind_ortvalue_input(base_keys_in_name, base_next_keys_ort)
+        binding.bind_ortvalue_input(base_values_in_name, base_next_values_ort)
+        binding.bind_ortvalue_input(residual_keys_in_name, residual_next_keys_ort)
+        binding.bind_ortvalue_input(residual_values_in_name, residual_next_values_ort)
+        binding.bind_ortvalue_input(prefix_in_name, prefix_feat_cond_ort)
+
+        # Decode 阶段输出：首步由 ORT 分配，之后写入与本步输入不同的那组缓冲区
+        if on_cpu:
+            binding.bind_ortvalue_output(pred_name, ort.OrtValue.ortvalue_from_numpy(pred_slab[step]))
+        else:
+            binding.bind_output(pred_name, device_type, device_id)
+        if hidden_bufs is None:
+            binding.bind_output(hidden_name, device_type, device_id)
+            binding.bind_output(stop_name, 'cpu')
+        else:
+            binding.bind_ortvalue_output(hidden_name, hidden_bufs[step % 2])
+            binding.bind_ortvalue_output(stop_name, stop_buf)
+        for name in kv_out_names:
+            binding.bind_output(name, device_type, device_id)
 
         # 运行 Decode 步骤
-        dec_out = decode_sess.run_with_ort_values(decode_out_names, input_feed_decode)
+        decode.sess.run_with_iobinding(binding, run_options)
 
         (
             pred_feat_ort,
@@ -125,11 +273,15 @@ def run_inference(prefill_sess: ort.InferenceSession,
             new_residual_next_keys_ort,
             new_residual_next_values_ort,
             stop_flag_ort,
-        ) = dec_out
+        ) = binding.get_outputs()
+
+        if hidden_bufs is None:
+            hidden_bufs = [_alloc_like(new_dit_hidden_ort, device_type, device_id) for _ in range(2)]
+            stop_buf = _alloc_like(stop_flag_ort, 'cpu', 0)
 
-        # 保存预测特征
-        pred_feat = pred_feat_ort.numpy()
-        pred_seq.append(pred_feat)
+        if not on_cpu:
+            pred_seq.append(pred_feat_ort)
+        num_steps += 1
 
         # 更新状态
         prefix_feat_cond_ort = pred_feat_ort
@@ -139,26 +291,31 @@ def run_inference(prefill_sess: ort.InferenceSession,
         residual_next_keys_ort = new_residual_next_keys_ort
         residual_next_values_ort = new_residual_next_values_ort
 
-        # 检查停止条件
-        flag = bool(stop_flag_ort.numpy().reshape(-1)[0])
-        if len(pred_seq) > min_len and flag:
-            print(f"[OK] 停止标志检测到，在第 {step+1} 步停止生成")
-            break
+        # 检查停止条件（未达到最小长度前无需读取停止标志）
+        if num_steps > min_len:
+            # 运行选项关闭了执行提供程序的同步，读取前需等待 stop_flag 拷回主机内存
+            binding.synchronize_outputs()
+            if bool(stop_flag_ort.numpy().reshape(-1)[0]):
+                print(f"[OK] 停止标志检测到，在第 {step+1} 步停止生成")
+                break
 
     # 处理输出序列
-    if len(pred_seq) == 0:
+    if num_steps == 0:
         print("[WARNING] 警告：没有生成任何特征，返回零张量")
         return np.zeros((1, 64, 0), dtype=inference_dtype)
 
+    preds = pred_slab[:num_steps] if on_cpu else np.stack([v.numpy() for v in pred_seq])
+
     # 重塑序列 [batch, seq_len, patch_size, feat_dim] -> [batch, feat_dim, total_len]
-    seq = np.concatenate([s[np.newaxis, ...] for s in pred_seq], axis=1)  # [1, T, patch_size, feat_dim]
+    seq = preds.reshape((1, -1) + preds.shape[2:])  # [1, T, patch_size, feat_dim]
     seq = np.transpose(seq, (0, 3, 1, 2))  # [1, feat_dim, T, patch_size]
     B, D, T, P = seq.shape
 
-    # 展平最后两个维度
-    result = seq.reshape(B, D, T * P).astype(inference_dtype)
+    # 直接按目标布局分配结果，转置与类型转换合并为一次拷贝；展平最后两个维度只是视图
+    result = np.empty((B, D, T * P), dtype=inference_dtype)
+    np.copyto(result.reshape(B, D, T, P), seq)
 
-    print(f"[OK] 解码完成: 生成了 {len(pred_seq)} 个 patch, 总维度 {result.shape}")
+    print(f"[OK] 解码完成: 生成了 {num_steps} 个 patch, 总维度 {result.shape}")
 
     return result
 
@@ -4,6 +4,9 @@
 提供 VoxCPM 推理输入构建功能，支持 VoxCPM-0.5B 和 VoxCPM-1.5。
 """
 
+import threading
+import weakref
+from collections import OrderedDict
 from typing import Optional, Tuple
 import time
 import numpy as np
@@ -13,6 +16,95 @@ from .constants import AUDIO_START_TOKEN, get_constants_for_version
 from .audio_v15 import read_audio_mono
 from .vae import encode_audio_to_patches
 
+# 每个分词器最多缓存的文本条数
+_TOKENIZE_CACHE_SIZE = 128
+# 分词器 -> {文本: int64 字节串}；弱引用键不会阻止卸载模型后释放分词器
+_TOKENIZE_CACHE: "weakref.WeakKeyDictionary[object, OrderedDict]" = weakref.WeakKeyDictionary()
+_TOKENIZE_LOCK = threading.Lock()
+
+
+def _tokenize_cached(tokenizer, text: str) -> bytes:
+    """分词并以 int64 字节串形式缓存结果（同一分词器、相同文本只分词一次）"""
+    with _TOKENIZE_LOCK:
+        cache = _TOKENIZE_CACHE.get(tokenizer)
+        if cache is None:
+            cache = _TOKENIZE_CACHE[tokenizer] = OrderedDict()
+        ids = cache.get(text)
+        if ids is not None:
+            cache.move_to_end(text)
+            return ids
+
+    tokenized = tokenizer(text)
+    # 处理分词器返回的不同格式
+    if isinstance(tokenized, dict):
+        tokenized = tokenized['input_ids']
+    ids = np.asarray(tokenized, dtype=np.int64).tobytes()
+
+    with _TOKENIZE_LOCK:
+        cache[text] = ids
+        if len(cache) > _TOKENIZE_CACHE_SIZE:
+            cache.popitem(last=False)
+    return ids
+
+
+def _tokenize(tokenizer, text: str) -> np.ndarray:
+    """
+    分词并返回 int64 token 数组
+
+    交互场景下相同的提示文本和目标文本会被反复合成，分词结果按 (分词器, 文本) 缓存。
+
+    Args:
+        tokenizer: 分词器
+        text: 待分词文本
+
+    Returns:
+        np.ndarray: 只读的 token 数组
+    """
+    return np.frombuffer(_tokenize_cached(tokenizer, text), dtype=np.int64)
+
+
+def _append_audio_start(text_token: np.ndarray) -> np.ndarray:
+    """在 token 序列末尾追加音频起始 token（直接分配 n+1 长度的数组，不经过 np.concatenate）"""
+    tokens = np.empty(text_token.shape[0] + 1, dtype=np.int64)
+    tokens[:-1] = text_token
+    tokens[-1] = AUDIO_START_TOKEN
+    return tokens
+
+
+def _concat_text_and_audio(text_token: np.ndarray,
+                           patches: np.ndarray,
+                           patch_size: int,
+                           inference_dtype: np.dtype) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    拼接文本段与参考音频段（按总长度一次性分配输出，再按切片写入，不做中间拼接）
+
+    Args:
+        text_token: 文本 token（已包含音频起始 token）
+        patches: 参考音频 patches [audio_length, patch_size, 64]
+        patch_size: Patch 大小
+        inference_dtype: 推理数据类型
+
+    Returns:
+        Tuple: (text_token, text_mask, audio_feat, audio_mask)，均不含 batch 维度
+    """
+    text_length = text_token.shape[0]
+    total_len = text_length + patches.shape[0]
+
+    tokens = np.empty(total_len, dtype=np.int64)
+    tokens[:text_length] = text_token
+    tokens[text_length:] = 0
+
+    audio_feat = np.empty((total_len, patch_size, 64), dtype=inference_dtype)
+    audio_feat[:text_length] = 0
+    audio_feat[text_length:] = patches
+
+    text_mask = np.zeros(total_len, dtype=np.int32)
+    text_mask[:text_length] = 1
+    audio_mask = np.zeros(total_len, dtype=np.int32)
+    audio_mask[text_length:] = 1
+
+    return tokens, text_mask, audio_feat, audio_mask
+
 
 def build_inputs(tokenizer,
                  target_text: str,
@@ -49,10 +141,10 @@ def build_inputs(tokenizer,
         # 无参考音频的情况
         text = target_text
         t_tok0 = time.perf_counter()
-        text_token = np.array(tokenizer(text), dtype=np.int64)
+        text_token = _tokenize(tokenizer, text)
         tok_dt = time.perf_counter() - t_tok0
         print(f"[INFO] 分词耗时: {tok_dt:.3f}s，token数: {text_token.shape[0]}")
-        text_token = np.concatenate([text_token, np.array([AUDIO_START_TOKEN], dtype=np.int64)], axis=-1)
+        text_token = _append_audio_start(text_token)
         text_length = text_token.shape[0]
 
         # 对于不同的 patch_size，音频特征维度相同但结构不同
@@ -65,15 +157,10 @@ def build_inputs(tokenizer,
         # 有参考音频的情况
         text = (prompt_text or "") + (target_text or "")
         t_tok0 = time.perf_counter()
-        tokenized = tokenizer(text)
-        # 处理分词器返回的不同格式
-        if isinstance(tokenized, dict):
-            text_token = np.array(tokenized['input_ids'], dtype=np.int64)
-        else:
-            text_token = np.array(tokenized, dtype=np.int64)
+        text_token = _tokenize(tokenizer, text)
         tok_dt = time.perf_counter() - t_tok0
         print(f"[INFO] 分词耗时: {tok_dt:.3f}s，token数: {text_token.shape[0]}")
-        text_token = np.concatenate([text_token, np.array([AUDIO_START_TOKEN], dtype=np.int64)], axis=-1)
+        text_token = _append_audio_start(text_token)
         text_length = text_token.shape[0]
 
         # 读取和处理音频
@@ -91,12 +178,9 @@ def build_inputs(tokenizer,
         audio_length = patches.shape[0]
 
         # 构建输入序列
-        text_pad = np.zeros(audio_length, dtype=np.int64)
-        text_token = np.concatenate([text_token, text_pad])
-        audio_pad = np.zeros((text_length, patch_size, 64), dtype=inference_dtype)
-        audio_feat = np.concatenate([audio_pad, patches], axis=0)
-        text_mask = np.concatenate([np.ones(text_length), np.zeros(audio_length)]).astype(np.int32)
-        audio_mask = np.concatenate([np.zeros(text_length), np.ones(audio_length)]).astype(np.int32)
+        text_token, text_mask, audio_feat, audio_mask = _concat_text_and_audio(
+            text_token, patches, patch_size, inference_dtype
+        )
 
         print(f"[OK] 有参考音频输入构建完成: text_length={text_length}, audio_length={audio_length}, total_shape={audio_feat.shape}")
 
@@ -105,7 +189,6 @@ def build_inputs(tokenizer,
     text_mask = np.expand_dims(text_mask, 0)
     audio_feat = np.expand_dims(audio_feat, 0)
     audio_mask = np.expand_dims(audio_mask, 0)
-    audio_feat = audio_feat.astype(inference_dtype, copy=False)
 
     return text_token, text_mask, audio_feat, audio_mask
 
@@ -132,24 +215,15 @@ def build_inputs_with_patches(tokenizer,
     """
     text = (prompt_text or "") + (target_text or "")
     t_tok0 = time.perf_counter()
-    tokenized = tokenizer(text)
-    # 处理分词器返回的不同格式
-    if isinstance(tokenized, dict):
-        text_token = np.array(tokenized['input_ids'], dtype=np.int64)
-    else:
-        text_token = np.array(tokenized, dtype=np.int64)
+    text_token = _tokenize(tokenizer, text)
     tok_dt = time.perf_counter() - t_tok0
     print(f"[INFO] 分词耗时: {tok_dt:.3f}s，token数: {text_token.shape[0]}")
-    text_token = np.concatenate([text_token, np.array([AUDIO_START_TOKEN], dtype=np.int64)], axis=-1)
-    text_length = text_token.shape[0]
+    text_token = _append_audio_start(text_token)
 
-    audio_length = patches.shape[0]
-    text_pad = np.zeros(audio_length, dtype=np.int64)
-    text_token = np.concatenate([text_token, text_pad])
-    audio_pad = np.zeros((text_length, patch_size, 64), dtype=inference_dtype)
-    audio_feat = np.concatenate([audio_pad, patches.astype(inference_dtype)], axis=0)
-    text_mask = np.concatenate([np.ones(text_length), np.zeros(audio_length)]).astype(np.int32)
-    audio_mask = np.concatenate([np.zeros(text_length), np.ones(audio_length)]).astype(np.int32)
+    # 写入预分配数组时按 inference_dtype 转换 patches，无需额外拷贝
+    text_token, text_mask, audio_feat, audio_mask = _concat_text_and_audio(
+        text_token, patches, patch_size, inference_dtype
+    )
 
     text_token = np.expand_dims(text_token, 0)
     text_mask = np.expand_dims(text_mask, 0)
@@ -4,9 +4,39 @@ ONNX Runtime 管理模块
 提供 ONNX Runtime 会话创建、配置和执行提供者管理功能。
 """
 
+from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple
+import numpy as np
 import onnxruntime as ort
 
+# ONNX Runtime 张量类型字符串（NodeArg.type / OrtValue.data_type()）到 numpy 类型的映射
+ORT_NUMPY_TYPES = {
+    'tensor(float)': np.float32,
+    'tensor(float16)': np.float16,
+    'tensor(double)': np.float64,
+    'tensor(int32)': np.int32,
+    'tensor(int64)': np.int64,
+    'tensor(bool)': np.bool_,
+}
+
+
+@dataclass(frozen=True)
+class SessionBundle:
+    """推理会话及其输入/输出名称（名称在创建时查询一次，每次推理无需再访问 get_inputs/get_outputs）"""
+
+    sess: ort.InferenceSession
+    in_names: Tuple[str, ...]
+    out_names: Tuple[str, ...]
+
+    @classmethod
+    def from_session(cls, sess: ort.InferenceSession) -> "SessionBundle":
+        """从已创建的推理会话构建"""
+        return cls(
+            sess=sess,
+            in_names=tuple(inp.name for inp in sess.get_inputs()),
+            out_names=tuple(out.name for out in sess.get_outputs()),
+        )
+
 
 def create_session_options(max_threads: int, optimize: bool) -> ort.SessionOptions:
     """
@@ -49,10 +79,15 @@ def create_session_options(max_threads: int, optimize: bool) -> ort.SessionOptio
     return opts
 
 
-def create_run_options() -> ort.RunOptions:
+def create_run_options(shrink_arena: bool = False, device_type: str = 'cpu', device_id: int = 0) -> ort.RunOptions:
     """
     创建 ONNX Runtime 运行选项
 
+    Args:
+        shrink_arena: 运行结束后是否收缩内存池（适合 Prefill 这类单次调用，Decode 循环应保持内存池不收缩）
+        device_type: 设备类型
+        device_id: 设备 ID
+
     Returns:
         ort.RunOptions: 运行选项对象
     """
@@ -63,6 +98,12 @@ def create_run_options() -> ort.RunOptions:
         run_opts.add_run_config_entry('disable_synchronize_execution_providers', '1')
     except Exception:
         pass
+    if shrink_arena:
+        arenas = f"cpu:0;gpu:{device_id}" if device_type == 'cuda' else "cpu:0"
+        try:
+            run_opts.add_run_config_entry('memory.enable_memory_arena_shrinkage', arenas)
+        except Exception:
+            pass
     return run_opts
 
 
@@ -268,6 +309,25 @@ def create_session(model_path: str,
                 return ort.InferenceSession(model_path, sess_options=session_opts, providers=providers)
 
 
+def create_session_bundle(model_path: str,
+                          session_opts: ort.SessionOptions,
+                          providers: List[str],
+                          provider_options: List[Dict[str, Any]]) -> SessionBundle:
+    """
+    创建推理会话并缓存其输入/输出名称
+
+    Args:
+        model_path: 模型路径
+        session_opts: 会话选项
+        providers: 提供者列表
+        provider_options: 提供者选项列表
+
+    Returns:
+        SessionBundle: 推理会话及输入/输出名称
+    """
+    return SessionBundle.from_session(create_session(model_path, session_opts, providers, provider_options))
+
+
 def get_device_info_from_providers(providers: List[str], device_id: int = 0) -> Tuple[str, int]:
     """
     从提供者列表获取设备信息
@@ -295,9 +355,12 @@ def get_device_info_from_providers(providers: List[str], device_id: int = 0) ->
 
 
 __all__ = [
+    "ORT_NUMPY_TYPES",
     "create_session_options",
     "create_run_options",
     "configure_providers",
     "create_session",
+    "create_session_bundle",
+    "SessionBundle",
     "get_device_info_from_providers",
 ]
\ No newline at end of file
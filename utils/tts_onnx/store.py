@@ -1,16 +1,73 @@
 """
 特征存储模块
 
-提供参考音频特征的 SQLite 持久化存储功能。
+提供参考音频特征及 Prefill 状态的 SQLite 持久化存储功能。
 """
 
 import io
 import sqlite3
+import threading
 import time
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 
+# 每个线程按数据库路径保留一个长连接，避免每次读写都重新打开连接、初始化日志
+_local = threading.local()
+# 本进程内已建表的数据库路径
+_initialized_dbs = set()
+_init_lock = threading.Lock()
+
+
+def _get_conn(db_path: str) -> sqlite3.Connection:
+    """
+    获取当前线程的数据库连接（首次使用时创建并启用 WAL）
+
+    Args:
+        db_path: 数据库文件路径
+
+    Returns:
+        sqlite3.Connection: 数据库连接
+    """
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conns[db_path] = conn
+    return conn
+
+
+def close_db(db_path: str) -> None:
+    """
+    关闭当前线程中该数据库的连接（删除数据库文件前调用，其他线程的连接需在各自线程中关闭）
+
+    Args:
+        db_path: 数据库文件路径
+    """
+    conns = getattr(_local, "conns", None)
+    conn = conns.pop(db_path, None) if conns else None
+    if conn is not None:
+        conn.close()
+    with _init_lock:
+        _initialized_dbs.discard(db_path)
+
+
+def _encode_array(arr: np.ndarray) -> Tuple[bytes, str, str]:
+    """将数组转换为 (原始字节, dtype 字符串, 形状字符串)"""
+    arr = np.ascontiguousarray(arr)
+    return arr.tobytes(), arr.dtype.str, ",".join(str(dim) for dim in arr.shape)
+
+
+def _decode_array(blob: bytes, array_dtype: str, shape_str: str) -> np.ndarray:
+    """从原始字节还原数组（直接引用字节数据的只读视图）"""
+    shape = tuple(int(dim) for dim in shape_str.split(",")) if shape_str else ()
+    return np.frombuffer(blob, dtype=np.dtype(array_dtype)).reshape(shape)
+
 
 def init_db(db_path: str) -> None:
     """
@@ -19,8 +76,9 @@ def init_db(db_path: str) -> None:
     Args:
         db_path: 数据库文件路径
     """
-    conn = sqlite3.connect(db_path)
-    try:
+    if db_path in _initialized_dbs:
+        return
+    with _init_lock, _get_conn(db_path) as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS ref_features (
@@ -29,13 +87,36 @@ def init_db(db_path: str) -> None:
                 patch_size INTEGER,
                 dtype TEXT,
                 created_at INTEGER,
-                data BLOB
+                data BLOB,
+                array_dtype TEXT,
+                shape TEXT
             )
             """
         )
-        conn.commit()
-    finally:
-        conn.close()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prefill_states (
+                id TEXT,
+                name TEXT,
+                array_dtype TEXT,
+                shape TEXT,
+                created_at INTEGER,
+                data BLOB,
+                last_used INTEGER,
+                PRIMARY KEY (id, name)
+            )
+            """
+        )
+        # 旧版本数据库没有原始数组的类型/形状列，补齐后旧记录仍按 npy 格式读取
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(ref_features)")}
+        for column in ("array_dtype", "shape"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE ref_features ADD COLUMN {column} TEXT")
+        # 旧版本的 prefill_states 没有最近使用时间列，补齐后旧记录会最先被淘汰
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(prefill_states)")}
+        if "last_used" not in columns:
+            conn.execute("ALTER TABLE prefill_states ADD COLUMN last_used INTEGER")
+    _initialized_dbs.add(db_path)
 
 
 def save_ref_features(db_path: str,
@@ -55,25 +136,20 @@ def save_ref_features(db_path: str,
         dtype_str: 数据类型字符串
         patches: 音频 patches
     """
-    # 确保表存在
+    # 确保表存在（每个数据库只建表一次）
     init_db(db_path)
-    buf = io.BytesIO()
-    # Store in npy format for portability (contains shape and dtype)
-    np.save(buf, patches)
-    blob = buf.getvalue()
+    # 直接存储连续内存的原始字节，数组类型和形状单独存列，读取时无需解析 npy 头
+    blob, array_dtype, shape_str = _encode_array(patches)
     ts = int(time.time() * 1000)
-    conn = sqlite3.connect(db_path)
-    try:
+    with _get_conn(db_path) as conn:
         conn.execute(
             """
-            INSERT OR REPLACE INTO ref_features (id, prompt_text, patch_size, dtype, created_at, data)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT OR REPLACE INTO ref_features (id, prompt_text, patch_size, dtype, created_at, data, array_dtype, shape)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (feat_id, prompt_text or "", int(patch_size), dtype_str, ts, sqlite3.Binary(blob)),
+            (feat_id, prompt_text or "", int(patch_size), dtype_str, ts, sqlite3.Binary(blob),
+             array_dtype, shape_str),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def load_ref_features(db_path: str, feat_id: str) -> Tuple[np.ndarray, int, str, str]:
@@ -85,25 +161,95 @@ def load_ref_features(db_path: str, feat_id: str) -> Tuple[np.ndarray, int, str,
         feat_id: 特征 ID
 
     Returns:
-        Tuple[np.ndarray, int, str, str]: (patches, patch_size, prompt_text, dtype)
+        Tuple[np.ndarray, int, str, str]: (patches, patch_size, prompt_text, dtype)，
+            新格式记录返回的 patches 是直接引用数据库字节的只读数组
     """
-    # 确保表存在
+    # 确保表存在（每个数据库只建表一次）
     init_db(db_path)
-    conn = sqlite3.connect(db_path)
-    try:
+    with _get_conn(db_path) as conn:
         cur = conn.execute(
-            "SELECT prompt_text, patch_size, dtype, data FROM ref_features WHERE id = ?",
+            "SELECT prompt_text, patch_size, dtype, data, array_dtype, shape FROM ref_features WHERE id = ?",
             (feat_id,),
         )
         row = cur.fetchone()
         if row is None:
             raise KeyError(f"feat_id not found: {feat_id}")
-        prompt_text, patch_size, dtype_str, blob = row
-        buf = io.BytesIO(blob)
-        patches = np.load(buf)
+        prompt_text, patch_size, dtype_str, blob, array_dtype, shape_str = row
+        if shape_str is None:
+            # 旧记录以 npy 格式存储
+            patches = np.load(io.BytesIO(blob))
+        else:
+            patches = _decode_array(blob, array_dtype, shape_str)
         return patches, int(patch_size), str(prompt_text or ""), str(dtype_str)
-    finally:
-        conn.close()
 
 
-__all__ = ["init_db", "save_ref_features", "load_ref_features"]
\ No newline at end of file
+def save_prefill_state(db_path: str,
+                       state_id: str,
+                       states: Dict[str, np.ndarray],
+                       max_entries: int = 32) -> None:
+    """
+    保存 Prefill 阶段输出的状态到 SQLite，超出条目上限时淘汰最久未使用的状态
+
+    Args:
+        db_path: 数据库文件路径
+        state_id: 状态 ID（由完整推理输入计算的哈希）
+        states: 输出名称到数组的映射
+        max_entries: 最多保留的状态条数（按状态 ID 计），小于等于 0 时不限制
+    """
+    # 确保表存在（每个数据库只建表一次）
+    init_db(db_path)
+    ts = int(time.time() * 1000)
+    rows = []
+    for name, arr in states.items():
+        blob, array_dtype, shape_str = _encode_array(arr)
+        rows.append((state_id, name, array_dtype, shape_str, ts, sqlite3.Binary(blob), ts))
+    with _get_conn(db_path) as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO prefill_states (id, name, array_dtype, shape, created_at, data, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        if max_entries > 0:
+            # 每条状态包含完整的 KV 缓存，体积较大，只保留最近使用的若干条
+            conn.execute(
+                """
+                DELETE FROM prefill_states WHERE id IN (
+                    SELECT id FROM prefill_states GROUP BY id
+                    ORDER BY MAX(COALESCE(last_used, 0)) DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (int(max_entries),),
+            )
+
+
+def load_prefill_state(db_path: str, state_id: str) -> Optional[Dict[str, np.ndarray]]:
+    """
+    从 SQLite 加载 Prefill 阶段的状态
+
+    Args:
+        db_path: 数据库文件路径
+        state_id: 状态 ID
+
+    Returns:
+        Optional[Dict[str, np.ndarray]]: 输出名称到只读数组的映射，不存在时返回 None
+    """
+    # 确保表存在（每个数据库只建表一次）
+    init_db(db_path)
+    with _get_conn(db_path) as conn:
+        cur = conn.execute(
+            "SELECT name, array_dtype, shape, data FROM prefill_states WHERE id = ?",
+            (state_id,),
+        )
+        states = {name: _decode_array(blob, array_dtype, shape_str) for name, array_dtype, shape_str, blob in cur}
+        if states:
+            # 记录命中时间，供保存新状态时按最近使用淘汰
+            conn.execute(
+                "UPDATE prefill_states SET last_used = ? WHERE id = ?",
+                (int(time.time() * 1000), state_id),
+            )
+        return states or None
+
+
+__all__ = ["init_db", "close_db", "save_ref_features", "load_ref_features", "save_prefill_state", "load_prefill_state"]
\ No newline at end of file
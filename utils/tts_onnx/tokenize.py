@@ -12,6 +12,9 @@ try:
 except Exception:
     LlamaTokenizerFast = None
 
+# 去除 SentencePiece 词首标记 "▁" 的转换表
+_SPIECE_STRIP = str.maketrans("", "", "▁")
+
 
 def mask_multichar_chinese_tokens(tokenizer: Any):
     """
@@ -28,10 +31,10 @@ def mask_multichar_chinese_tokens(tokenizer: Any):
     vocab = getattr(tokenizer, "vocab", None)
     if vocab is None:
         vocab = tokenizer.get_vocab()
-    multichar_tokens = {
+    multichar_tokens = frozenset(
         token for token in vocab.keys()
         if isinstance(token, str) and len(token) >= 2 and all("\u4e00" <= c <= "\u9fff" for c in token)
-    }
+    )
 
     class CharTokenizerWrapper:
         def __init__(self, base_tokenizer):
@@ -42,13 +45,15 @@ def mask_multichar_chinese_tokens(tokenizer: Any):
             if not isinstance(text, str):
                 raise TypeError(f"Expected string input, got {type(text)}")
             tokens = self.tokenizer.tokenize(text, **kwargs)
+            multichar = self.multichar_tokens
             processed = []
+            extend, append = processed.extend, processed.append
             for token in tokens:
-                clean_token = token.replace("▁", "")
-                if clean_token in self.multichar_tokens:
-                    processed.extend(list(clean_token))
+                clean_token = token.translate(_SPIECE_STRIP)
+                if clean_token in multichar:
+                    extend(clean_token)
                 else:
-                    processed.append(token)
+                    append(token)
             return processed
 
         def __call__(self, text: str, **kwargs):
@@ -4,40 +4,57 @@ VAE 编码/解码模块
 提供音频 VAE 编码和解码功能。
 """
 
-from typing import Optional
+import weakref
+from typing import Dict, Optional
 import numpy as np
 import onnxruntime as ort
 
 from .constants import CHUNK_SIZE
+from .runtime import ORT_NUMPY_TYPES
+
+# 会话 -> 输入名称到数据类型的映射；弱引用键不会阻止卸载模型后释放会话
+_INPUT_DTYPES: "weakref.WeakKeyDictionary[ort.InferenceSession, Dict[str, type]]" = weakref.WeakKeyDictionary()
+
+
+def _input_dtypes(session: ort.InferenceSession) -> Dict[str, type]:
+    """查询会话全部输入的数据类型（每个会话只查询一次）"""
+    dtypes = _INPUT_DTYPES.get(session)
+    if dtypes is None:
+        dtypes = {inp.name: ORT_NUMPY_TYPES.get(inp.type, np.float32) for inp in session.get_inputs()}
+        _INPUT_DTYPES[session] = dtypes
+    return dtypes
 
 
 def get_model_input_dtype(session: ort.InferenceSession, input_name: str) -> np.dtype:
     """
-    获取模型输入的数据类型
+    获取模型输入的数据类型（按会话缓存）
 
     Args:
         session: ONNX 会话
         input_name: 输入名称
 
     Returns:
-        np.dtype: 数据类型
+        np.dtype: 数据类型，未知输入或类型时返回 np.float32
+    """
+    return _input_dtypes(session).get(input_name, np.float32)
+
+
+def _pad_zeros_last_axis(arr: np.ndarray, pad_len: int) -> np.ndarray:
+    """
+    在最后一个维度末尾补零（预分配输出后按切片写入，不经过 np.pad 的中间数组）
+
+    Args:
+        arr: 输入数组
+        pad_len: 补零长度
+
+    Returns:
+        np.ndarray: 补零后的数组
     """
-    for inp in session.get_inputs():
-        if inp.name == input_name:
-            onnx_type = inp.type
-            s = str(onnx_type)
-            if 'tensor_type' in s:
-                if 'float16' in s:
-                    return np.float16
-                elif 'float32' in s:
-                    return np.float32
-                elif 'float64' in s:
-                    return np.float64
-                elif 'int32' in s:
-                    return np.int32
-                elif 'int64' in s:
-                    return np.int64
-    return np.float32
+    n = arr.shape[-1]
+    out = np.empty(arr.shape[:-1] + (n + pad_len,), dtype=arr.dtype)
+    out[..., :n] = arr
+    out[..., n:] = 0
+    return out
 
 
 def encode_audio_to_patches(vae_enc_sess: ort.InferenceSession,
@@ -56,12 +73,12 @@ def encode_audio_to_patches(vae_enc_sess: ort.InferenceSession,
         run_options: 运行选项
 
     Returns:
-        np.ndarray: 编码后的 patches [num_patches, patch_size, latent_dim]
+        np.ndarray: 编码后的 patches [num_patches, patch_size, latent_dim]，类型一致时为 VAE 输出的非连续视图
     """
     patch_len = patch_size * CHUNK_SIZE
     if audio.shape[0] % patch_len != 0:
         pad_len = patch_len - (audio.shape[0] % patch_len)
-        audio = np.pad(audio, (0, pad_len), mode="constant")
+        audio = _pad_zeros_last_axis(audio, pad_len)
     vae_input_dtype = get_model_input_dtype(vae_enc_sess, "audio_data")
     inp = audio.reshape(1, 1, -1).astype(vae_input_dtype)
     z = vae_enc_sess.run(None, {"audio_data": inp}, run_options=run_options)[0]
@@ -74,15 +91,18 @@ def encode_audio_to_patches(vae_enc_sess: ort.InferenceSession,
     if L % patch_size != 0:
         # Pad the latent to make it divisible by patch_size
         pad_len = patch_size - (L % patch_size)
-        z = np.pad(z, ((0, 0), (0, pad_len)), mode='constant', constant_values=0)
+        z = _pad_zeros_last_axis(z, pad_len)
         L = z.shape[1]
         print(f"[WARNING] Padded audio latent from {L-pad_len} to {L} (pad_len={pad_len})")
 
     T = L // patch_size
+    # reshape / transpose / 切片都是视图；类型已一致时直接返回视图，否则一次拷贝完成转置和类型转换
     patches = z.reshape(D, T, patch_size).transpose(1, 2, 0)
     if patches.shape[0] > 0:
         patches = patches[:-1, ...]
-    return patches.astype(inference_dtype)
+    if patches.dtype == inference_dtype:
+        return patches
+    return np.ascontiguousarray(patches, dtype=inference_dtype)
 
 
 def decode_audio(vae_dec_sess: ort.InferenceSession,